@@ -0,0 +1,38 @@
+"""Mixin with the chunk loop shared by the stages that process their input in chunks"""
+
+from typing import Any, Callable, Iterable
+
+from rail.utils.iterator_utils import collect_after_chunk, prefetch_iterator
+
+
+class ChunkedRunMixin:
+    """Run loop for stages that process their input one chunk at a time
+
+    The next chunk is read in a background thread while the current one is
+    being processed, so that reading and processing overlap.
+    """
+
+    # provided by the RailStage the mixin is used with
+    rank: int
+    _process_chunk: Callable[[int, int, Any, bool], None]
+
+    def _run_chunks(self, iterator: Iterable, label: str | None = None) -> None:
+        """Call `_process_chunk` on each chunk from an input iterator
+
+        Parameters
+        ----------
+        iterator : Iterable
+            The (start, end, data) chunks, as from `RailStage.input_iterator`
+        label : str | None
+            If given, print a progress message naming this for each chunk
+        """
+        first = True
+        for i_chunk, (start, end, data) in enumerate(prefetch_iterator(iterator)):
+            if label is not None:
+                print(
+                    f"Process {self.rank} running {label} on chunk {start:,} - {end:,}"
+                )
+            self._process_chunk(start, end, data, first)
+            first = False
+            del data
+            collect_after_chunk(i_chunk)
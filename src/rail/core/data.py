@@ -764,9 +764,22 @@ class ModelDict(dict):
     2. There is a read(path, force=False) method that reads a model object and
         inserts it into the dictionary
     3. There is a single static instance of this class
+    4. A model is re-read if its file was modified, but kept if it was deleted
 
     """
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._mtimes: dict[str, int | None] = {}  # of the files read or written
+
+    @staticmethod
+    def _mtime(path: str) -> int | None:
+        return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+    def _is_stale(self, path: str) -> bool:
+        mtime = self._mtime(path)
+        return mtime is not None and self._mtimes.get(path, mtime) != mtime
+
     def open(self, path: str, mode: str, **kwargs: Any) -> FileLike:
         """Open the file and return the file handle"""
         return open(path, mode, **kwargs)  # pylint: disable=unspecified-encoding
@@ -781,9 +794,10 @@ class ModelDict(dict):
         """Read a model into this dict"""
         if reader is None:
             reader = default_model_read
-        if force or path not in self:
+        if force or path not in self or self._is_stale(path):
             model = reader(path)
             self[path] = model
+            self._mtimes[path] = self._mtime(path)
             return model
         return self[path]
 
@@ -801,6 +815,7 @@ class ModelDict(dict):
         if force or path not in self or not os.path.exists(path):
             self[path] = model
             writer(model, path)
+            self._mtimes[path] = self._mtime(path)
 
 
 class ModelHandle(DataHandle):
@@ -6,6 +6,30 @@ from scipy.integrate import simpson
 from scipy.optimize import minimize_scalar
 
 from rail.core.common_params import SHARED_PARAMS, SharedParams
+from rail.utils.numba_utils import HAS_NUMBA, njit, prange
+
+
+@njit(parallel=True, cache=True)
+def _row_argmax(vals: np.ndarray) -> np.ndarray:  # pragma: no cover
+    # same as np.argmax(vals, axis=1), including returning the first NaN of a
+    # row that has any, but with the rows spread over threads
+    nrow, ncol = vals.shape
+    out = np.zeros(nrow, dtype=np.int64)
+    for i in prange(nrow):
+        best = 0
+        best_val = vals[i, 0]
+        if np.isnan(best_val):
+            continue
+        for k in range(1, ncol):
+            val = vals[i, k]
+            if np.isnan(val):
+                best = k
+                break
+            if val > best_val:
+                best = k
+                best_val = val
+        out[i] = best
+    return out
 
 
 class PointEstimationMixin:
@@ -53,8 +77,14 @@ class PointEstimationMixin:
             - `_calculate_median_point_estimate`
         """
 
-        ancil_dict: dict[str, NDArray] = dict()
         calculated_point_estimates = []
+        if "calculated_point_estimates" in self.config:
+            calculated_point_estimates = self.config["calculated_point_estimates"]
+        if not calculated_point_estimates:
+            # the default, nothing to compute or attach
+            return qp_dist
+
+        ancil_dict: dict[str, NDArray] = dict()
 
         existing_ancil = qp_dist.ancil
         if existing_ancil and not self.config.recompute_point_estimates:
@@ -68,9 +98,6 @@ class PointEstimationMixin:
             skip_zmedian = False
             skip_zbest = False
 
-        if "calculated_point_estimates" in self.config:
-            calculated_point_estimates = self.config["calculated_point_estimates"]
-
         if "zmode" in calculated_point_estimates and not skip_zmode:
             mode_value = self._calculate_mode_point_estimate(qp_dist, grid)
             ancil_dict.update(zmode=mode_value)
@@ -87,14 +114,47 @@ class PointEstimationMixin:
             best_value = self._calculate_best_point_estimate(qp_dist)
             ancil_dict.update(zbest=best_value)
 
-        if calculated_point_estimates:
-            if qp_dist.ancil is None:
-                qp_dist.set_ancil(ancil_dict)
-            else:
-                qp_dist.add_to_ancil(ancil_dict)
+        if qp_dist.ancil is None:
+            qp_dist.set_ancil(ancil_dict)
+        else:
+            qp_dist.add_to_ancil(ancil_dict)
 
         return qp_dist
 
+    def _default_point_estimate_grid(self) -> NDArray:
+        """Return the grid defined by the `zmin`, `zmax` and `nzbins` config keys
+
+        The grid is built once and reused for every chunk, for as long as the
+        configuration does not change, which saves one `np.linspace` per chunk.
+
+        The cached grid is only rebuilt when one of the `zmin`, `zmax` or
+        `nzbins` config values changes.  It does not follow other attributes,
+        e.g., assigning ``self.zgrid`` does not change it; estimators that use
+        their own grid should pass it to `calculate_point_estimates` instead.
+
+        Returns
+        -------
+        NDArray
+            The grid on which to evaluate point estimates
+
+        Raises
+        ------
+        KeyError
+            If any of `zmin`, `zmax` and `nzbins` is missing from the stage config
+        """
+        for key in ["zmin", "zmax", "nzbins"]:
+            if key not in self.config:  # pragma: no cover
+                raise KeyError(
+                    f"Expected `{key}` to be defined in stage "
+                    "configuration dictionary in order to calculate point estimates."
+                )
+        grid_key = (self.config.zmin, self.config.zmax, self.config.nzbins)
+        cached = getattr(self, "_point_estimate_grid", None)
+        if cached is None or cached[0] != grid_key:
+            cached = (grid_key, np.linspace(*grid_key))
+            self._point_estimate_grid = cached
+        return cached[1]
+
     def _calculate_mode_point_estimate(
         self, qp_dist: qp.Ensemble, grid: NDArray | list | None = None
     ) -> NDArray:
@@ -123,16 +183,17 @@ class PointEstimationMixin:
             we'll raise a KeyError.
         """
         if grid is None:
-            for key in ["zmin", "zmax", "nzbins"]:
-                if key not in self.config:  # pragma: no cover
-                    raise KeyError(
-                        f"Expected `{key}` to be defined in stage "
-                        "configuration dictionary in order to caluclate mode."
-                    )
-
-            grid = np.linspace(self.config.zmin, self.config.zmax, self.config.nzbins)
-
-        return qp_dist.mode(grid=grid)
+            grid = self._default_point_estimate_grid()
+
+        # this is what qp_dist.mode(grid) does, gridded() caches the p(z) values
+        # on the ensemble so other point estimates on the same grid can reuse them
+        grid, pdf_vals = qp_dist.gridded(grid)
+        pdf_vals = np.atleast_2d(pdf_vals)
+        if HAS_NUMBA:
+            mode_idx = _row_argmax(np.ascontiguousarray(pdf_vals))
+        else:  # pragma: no cover
+            mode_idx = np.argmax(pdf_vals, axis=1)
+        return np.expand_dims(np.asarray(grid)[mode_idx], -1)
 
     def _calculate_mean_point_estimate(self, qp_dist: qp.Ensemble) -> NDArray:
         """Calculates and returns the mean values for a set of posterior estimates
@@ -186,20 +247,15 @@ class PointEstimationMixin:
         """
 
         if grid is None:
-            for key in ["zmin", "zmax", "nzbins"]:
-                if key not in self.config:  # pragma: no cover
-                    raise KeyError(
-                        f"Expected `{key}` to be defined in stage "
-                        "configuration dictionary in order to caluclate mode."
-                    )
-
-            grid = np.linspace(self.config.zmin, self.config.zmax, self.config.nzbins)
+            grid = self._default_point_estimate_grid()
         elif isinstance(grid, list):  # pragma: no cover
             grid = np.array(grid)
 
         assert isinstance(grid, np.ndarray)
 
-        pdf_vals = qp_dist.pdf(grid)
+        # shares the p(z) evaluation with the mode when both are on the same grid
+        _, pdf_vals = qp_dist.gridded(grid)
+        pdf_vals = np.atleast_2d(pdf_vals)
         N = pdf_vals.shape[0]
         zx_array = np.zeros(N)
 
@@ -513,6 +513,35 @@ class RailStage(PipelineStage):
         handle = self.add_handle(tag, data=data)
         return handle.data
 
+    def _chunk_size_for_ranks(self, n_rows: int, chunk_size: int) -> int:
+        """Reduce chunk_size if needed so that every process gets some rows
+
+        Parameters
+        ----------
+        n_rows
+            The number of rows in the input
+
+        chunk_size
+            The requested number of rows per chunk
+
+        Returns
+        -------
+        int
+            chunk_size, or ceil(n_rows / size) if that would leave some of
+            the processes without a chunk
+        """
+        total_chunks_needed = ceil(n_rows / chunk_size)
+        # If the number of process is larger than we need, we reduce chunk_size
+        # so that all of the processes have some data to work with.
+        if n_rows and total_chunks_needed < self.size:
+            chunk_size = int(ceil(n_rows / self.size))
+            print(
+                "Warning: You are reserving more processes than needed, reducing chunk size to",
+                chunk_size,
+                "to use all of the processes",
+            )
+        return chunk_size
+
     def input_iterator(self, tag: str, **kwargs: Any) -> Iterable:
         """Iterate the input assocated to a particular tag
 
@@ -548,17 +577,7 @@ class RailStage(PipelineStage):
         if on_disk:
             self._input_length = handle.size(groupname=groupname)
 
-            total_chunks_needed = ceil(self._input_length / chunk_size)
-            # If the number of process is larger than we need, we reduce chunk_size
-            # so that all of the processes have some data to work with.
-            if total_chunks_needed < self.size:  # pragma: no cover
-                self.config.chunk_size = int(ceil(self._input_length / self.size))
-                chunk_size = self.config.chunk_size
-                print(
-                    "Warning: You are reserving more processes than needed, reducing chunk size to",
-                    chunk_size,
-                    "to use all of the processes",
-                )
+            chunk_size = self._chunk_size_for_ranks(self._input_length, chunk_size)
 
             kwcopy = dict(
                 groupname=groupname,
@@ -567,6 +586,8 @@ class RailStage(PipelineStage):
                 parallel_size=self.size,
             )
             kwcopy.update(**kwargs)
+            # a chunk_size passed in kwargs may have been reduced above
+            kwcopy["chunk_size"] = chunk_size
             return handle.iterator(**kwcopy)
 
         # If data is in memory and not in a file, it means is small enough to process it
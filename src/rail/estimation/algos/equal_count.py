@@ -46,14 +46,18 @@ class EqualCountClassifier(PZClassifier):
 
         # tomographic bins with equal number density
         sortind = np.argsort(zb)
-        cum = np.arange(1, (len(zb) + 1))
-        bin_index = np.zeros(len(zb))
+        frac = np.arange(1, (len(zb) + 1)) / len(zb)
+        bin_index = np.full(
+            len(zb),
+            self.config.no_assign,
+            dtype=self._class_id_dtype(self.config.n_tom_bins, self.config.no_assign),
+        )
         for ii in range(self.config.n_tom_bins):
             perc1 = ii / self.config.n_tom_bins
             perc2 = (ii + 1) / self.config.n_tom_bins
-            ind = (cum / cum[-1] > perc1) & (cum / cum[-1] <= perc2)
+            ind = (frac > perc1) & (frac <= perc2)
             useind = sortind[ind]
-            bin_index[useind] = int(ii + 1)
+            bin_index[useind] = ii + 1
 
         if self.config.object_id_col != "":
             # below is commented out and replaced by a redundant line
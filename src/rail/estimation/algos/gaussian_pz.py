@@ -7,6 +7,13 @@ import qp
 
 from rail.estimation.estimator import PzEstimator
 from rail.estimation.informer import PzInformer
+from rail.utils.numba_utils import HAS_NUMBA, vectorize
+
+
+# no fastmath here, it would let the compiler assume the values are finite
+@vectorize(["f8(f8)", "f4(f4)"])
+def _safe_std(std: float) -> float:  # pragma: no cover
+    return std if np.isfinite(std) else 0.01
 
 
 class GaussianPzInformer(PzInformer):
@@ -36,7 +43,12 @@ class GaussianPzEstimator(PzEstimator):
 
         mean = np.squeeze(data.mean())
         std = np.squeeze(data.std())
-        std = np.where(np.isfinite(std), std, 0.01)
+        if HAS_NUMBA:
+            # NaN inputs would otherwise raise floating point warnings
+            with np.errstate(invalid="ignore"):
+                std = _safe_std(std)
+        else:  # pragma: no cover
+            std = np.where(np.isfinite(std), std, 0.01)
 
         qp_dstn = qp.Ensemble(qp.stats.norm, data=dict(loc=mean, scale=std))
         self._do_chunk_output(qp_dstn, start, end, first)
@@ -12,6 +12,7 @@ from rail.core.data import QPHandle, TableHandle, TableLike
 from rail.core.common_params import SharedParams
 from rail.estimation.informer import PzInformer
 from rail.estimation.summarizer import PZSummarizer
+from rail.utils.histogram_utils import normalize_stack, stack_bootstrap_draws
 
 
 class NaiveStackInformer(PzInformer):
@@ -28,7 +29,13 @@ class NaiveStackInformer(PzInformer):
 
 
 class NaiveStackSummarizer(PZSummarizer):
-    """Summarizer which stacks individual P(z)"""
+    """Summarizer which stacks individual P(z)
+
+    The bootstrap samples in ``output`` are drawn one chunk at a time, so the
+    number of objects in each sample is a sum of per-chunk Binomial draws that
+    scatters around the number of input objects, rather than being exactly
+    equal to it.  See `PZSummarizer._chunk_bootstrap_draws`.
+    """
 
     name = "NaiveStackSummarizer"
     entrypoint_function = "summarize"  # the user-facing science function for this class
@@ -90,25 +97,34 @@ class NaiveStackSummarizer(PZSummarizer):
         )
         assert self.zgrid is not None
         # Initializing the stacking pdf's
-        yvals = np.zeros((1, len(self.zgrid)))
+        yvals = np.zeros(len(self.zgrid))
         bvals = np.zeros((self.config.n_samples, len(self.zgrid)))
-        bootstrap_matrix = self._broadcast_bootstrap_matrix()
 
         first = True
         for s, e, test_data, mask in iterator:
             print(f"Process {self.rank} running estimator on chunk {s:,} - {e:,}")
-            self._process_chunk(
-                s, e, test_data, mask, first, bootstrap_matrix, yvals, bvals
-            )
+            self._process_chunk(s, e, test_data, mask, first, yvals, bvals)
             first = False
         if self.comm is not None:  # pragma: no cover
             bvals, yvals = self._join_histograms(bvals, yvals)
 
         if self.rank == 0:
             sample_ens = qp.Ensemble(
-                qp.interp, data=dict(xvals=self.zgrid, yvals=bvals)
+                qp.interp,
+                data=dict(
+                    xvals=self.zgrid,
+                    yvals=normalize_stack(bvals, self.zgrid),
+                    norm=False,
+                ),
+            )
+            qp_d = qp.Ensemble(
+                qp.interp,
+                data=dict(
+                    xvals=self.zgrid,
+                    yvals=normalize_stack(yvals[None, :], self.zgrid),
+                    norm=False,
+                ),
             )
-            qp_d = qp.Ensemble(qp.interp, data=dict(xvals=self.zgrid, yvals=yvals))
             self.add_data("output", sample_ens)
             self.add_data("single_NZ", qp_d)
 
@@ -119,30 +135,30 @@ class NaiveStackSummarizer(PZSummarizer):
         data: qp.Ensemble,
         mask: np.ndarray,
         _first: bool,
-        bootstrap_matrix: np.ndarray,
         yvals: np.ndarray,
         bvals: np.ndarray,
     ) -> None:
         assert self.zgrid is not None
-        pdf_vals = data.pdf(self.zgrid)
-        squeeze_mask = np.squeeze(mask)
-        yvals += np.expand_dims(
-            np.sum(
-                np.where(
-                    np.isfinite(pdf_vals[squeeze_mask, :]), pdf_vals[squeeze_mask], 0.0
-                ),
-                axis=0,
-            ),
-            0,
-        )
         # qp_d is the normalized probability of the stack, we need to know how many galaxies were
-        for i in range(self.config.n_samples):
-            bootstrap_draws = bootstrap_matrix[:, i]
-            # Neither all of the bootstrap_draws are in this chunk nor the index starts at "start"
-            chunk_mask = (bootstrap_draws >= start) & (bootstrap_draws < end)
-            bootstrap_draws = bootstrap_draws[chunk_mask] - start
-            zarr = np.where(squeeze_mask, pdf_vals.T, 0.0).T[bootstrap_draws]
-            bvals[i] += np.sum(zarr, axis=0)
+        sample_ids, local_idx = self._chunk_bootstrap_draws(start, end)
+        mask = np.ravel(mask)
+        if not mask.all():
+            if not mask.any():
+                return
+            # only evaluate the p(z) of the selected objects, and point the
+            # draws at their rows, dropping the draws of masked objects
+            keep = mask[local_idx]
+            sample_ids = sample_ids[keep]
+            local_idx = (np.cumsum(mask) - 1)[local_idx[keep]]
+            data = data[np.flatnonzero(mask)]
+        # pdf_vals is streamed once per bootstrap draw, so keep it in float32 to
+        # halve the memory traffic; the accumulators stay in float64.
+        # qp drops the object axis for single object chunks, so put it back
+        pdf_vals = np.atleast_2d(data.pdf(self.zgrid)).astype(np.float32, copy=False)
+        # zero the non-finite values in place, the bootstrap below reuses them
+        np.nan_to_num(pdf_vals, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        yvals += pdf_vals.sum(axis=0, dtype=np.float64)
+        stack_bootstrap_draws(pdf_vals, sample_ids, local_idx, bvals)
 
 
 class NaiveStackMaskedSummarizer(NaiveStackSummarizer):
@@ -157,35 +173,7 @@ class NaiveStackMaskedSummarizer(NaiveStackSummarizer):
     outputs = [("output", QPHandle), ("single_NZ", QPHandle)]
 
     def _setup_iterator(self) -> Generator:
-        selected_bin = self.config.selected_bin
-        if self.config.tomography_bins in ["none", None]:
-            selected_bin = -1
-
-        if selected_bin == -1:
-            itrs = [self.input_iterator("input")]
-        else:
-            itrs = [
-                self.input_iterator("input"),
-                self.input_iterator("tomography_bins"),
-            ]
-
-        for it in zip(*itrs):
-            first = True
-            mask = None
-            for s, e, d in it:
-                if first:
-                    start = s
-                    end = e
-                    pz_data = d
-                    first = False
-                else:
-                    mask = d["class_id"] == self.config.selected_bin
-            if mask is None:
-                mask = np.ones(
-                    pz_data.npdf,  # pylint: disable=possibly-used-before-assignment
-                    dtype=bool,
-                )
-            yield start, end, pz_data, mask  # pylint: disable=possibly-used-before-assignment
+        return self._selected_bin_iterator(super()._setup_iterator)
 
     def summarize(
         self, input_data: qp.Ensemble, tomo_bins: TableLike | None = None, **kwargs
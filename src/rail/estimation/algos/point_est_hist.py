@@ -12,6 +12,7 @@ from rail.core.data import QPHandle, TableHandle, TableLike
 from rail.core.common_params import SharedParams
 from rail.estimation.informer import PzInformer
 from rail.estimation.summarizer import PZSummarizer
+from rail.utils.histogram_utils import histogram_bootstrap_draws, uniform_bin_index
 
 
 class PointEstHistInformer(PzInformer):
@@ -28,7 +29,13 @@ class PointEstHistInformer(PzInformer):
 
 
 class PointEstHistSummarizer(PZSummarizer):
-    """Summarizer which simply histograms a point estimate"""
+    """Summarizer which simply histograms a point estimate
+
+    Each bootstrap histogram in ``output`` counts a Binomial number of draws
+    from every chunk, so its total fluctuates around the number of input
+    objects instead of matching it exactly.  See
+    `PZSummarizer._chunk_bootstrap_draws`.
+    """
 
     name = "PointEstHistSummarizer"
     entrypoint_function = "summarize"  # the user-facing science function for this class
@@ -64,17 +71,16 @@ class PointEstHistSummarizer(PZSummarizer):
         )
         assert self.zgrid is not None
         self.bincents = 0.5 * (self.zgrid[1:] + self.zgrid[:-1])
-        bootstrap_matrix = self._broadcast_bootstrap_matrix()
-        # Initiallizing the histograms
-        single_hist = np.zeros(self.config.nzbins)
-        hist_vals = np.zeros((self.config.n_samples, self.config.nzbins))
+        # Initiallizing the histograms, which hold integer counts
+        single_hist = np.zeros(self.config.nzbins, dtype=np.int64)
+        hist_vals = np.zeros(
+            (self.config.n_samples, self.config.nzbins), dtype=np.int64
+        )
 
         first = True
         for s, e, test_data, mask in iterator:
             print(f"Process {self.rank} running estimator on chunk {s:,} - {e:,}")
-            self._process_chunk(
-                s, e, test_data, mask, first, bootstrap_matrix, single_hist, hist_vals
-            )
+            self._process_chunk(s, e, test_data, mask, first, single_hist, hist_vals)
             first = False
             del test_data
         if self.comm is not None:  # pragma: no cover
@@ -97,20 +103,19 @@ class PointEstHistSummarizer(PZSummarizer):
         test_data: qp.Ensemble,
         mask: np.ndarray,
         _first: bool,
-        bootstrap_matrix: np.ndarray,
         single_hist: np.ndarray,
         hist_vals: np.ndarray,
     ) -> None:
         assert self.zgrid is not None
         zb = test_data.ancil[self.config.point_estimate_key]
-        single_hist += np.histogram(zb[mask], bins=self.zgrid)[0]
-        for i in range(self.config.n_samples):
-            bootstrap_indeces = bootstrap_matrix[:, i]
-            # Neither all of the bootstrap_draws are in this chunk nor the index starts at "start"
-            chunk_mask = (bootstrap_indeces >= start) & (bootstrap_indeces < end)
-            bootstrap_indeces = bootstrap_indeces[chunk_mask] - start
-            zarr = np.where(mask, zb, np.nan)[bootstrap_indeces]
-            hist_vals[i] += np.histogram(zarr, bins=self.zgrid)[0]
+        nzbins = self.config.nzbins
+        # bin each object once, flagging masked objects like out of range ones
+        gal_bin = uniform_bin_index(zb, self.zgrid)
+        gal_bin[~np.ravel(mask)] = -1
+        single_hist += np.bincount(gal_bin[gal_bin >= 0], minlength=nzbins)
+        # then the bootstrap draws just look up the bin of the drawn object
+        sample_ids, local_idx = self._chunk_bootstrap_draws(start, end)
+        histogram_bootstrap_draws(gal_bin, sample_ids, local_idx, hist_vals)
 
 
 class PointEstHistMaskedSummarizer(PointEstHistSummarizer):
@@ -127,35 +132,7 @@ class PointEstHistMaskedSummarizer(PointEstHistSummarizer):
     outputs = [("output", QPHandle), ("single_NZ", QPHandle)]
 
     def _setup_iterator(self) -> Generator:
-        selected_bin = self.config.selected_bin
-        if self.config.tomography_bins in ["none", None]:
-            selected_bin = -1
-
-        if selected_bin == -1:
-            itrs = [self.input_iterator("input")]
-        else:
-            itrs = [
-                self.input_iterator("input"),
-                self.input_iterator("tomography_bins"),
-            ]
-
-        for it in zip(*itrs):
-            first = True
-            mask = None
-            for s, e, d in it:
-                if first:
-                    start = s
-                    end = e
-                    pz_data = d
-                    first = False
-                else:
-                    mask = d["class_id"] == self.config.selected_bin
-            if mask is None:
-                mask = np.ones(
-                    pz_data.npdf,  # pylint: disable=possibly-used-before-assignment
-                    dtype=bool,
-                )
-            yield start, end, pz_data, mask  # pylint: disable=possibly-used-before-assignment
+        return self._selected_bin_iterator(super()._setup_iterator)
 
     def summarize(
         self, input_data: qp.Ensemble, tomo_bins: TableLike | None = None, **kwargs
@@ -9,7 +9,6 @@ from typing import Any
 import numpy as np
 import qp
 from ceci.config import StageParameter as Param
-from scipy.stats import norm
 
 from rail.core.data import ModelHandle, TableHandle, TableLike
 from rail.core.common_params import SharedParams
@@ -57,25 +56,27 @@ class RandomGaussEstimator(CatEstimator):
         super().__init__(args, **kwargs)
         self.zgrid = None
 
+    def _initialize_run(self) -> None:
+        super()._initialize_run()
+        # the grid is the same for every chunk, so build it once per run
+        self.zgrid = np.linspace(
+            self.config.rand_zmin, self.config.rand_zmax, self.config.nzbins
+        )
+
     def _process_chunk(
         self, start: int, end: int, data: TableLike, first: bool
     ) -> None:
-        pdf = []
         # allow for either format for now
         numzs = len(data[self.config.column_name])
         rng = np.random.default_rng(seed=self.config.seed + start)
-        zmode = np.round(rng.uniform(0.0, self.config.rand_zmax, numzs), 3)
+        zmode = rng.uniform(0.0, self.config.rand_zmax, numzs)
+        np.round(zmode, 3, out=zmode)
         widths = self.config.rand_width * (1.0 + zmode)
-        self.zgrid = np.linspace(
-            self.config.rand_zmin, self.config.rand_zmax, self.config.nzbins
-        )
-        for i in range(numzs):
-            pdf.append(norm.pdf(self.zgrid, zmode[i], widths[i]))
         qp_d = qp.Ensemble(
             qp.stats.norm,  # pylint: disable=no-member
             data=dict(
-                loc=np.expand_dims(zmode, -1),  # pylint: disable=no-member
-                scale=np.expand_dims(widths, -1),
+                loc=zmode[:, None],  # pylint: disable=no-member
+                scale=widths[:, None],
             ),
         )
         qp_d.set_ancil(dict(zmode=zmode))
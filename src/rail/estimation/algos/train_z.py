@@ -14,6 +14,7 @@ from rail.core.common_params import SHARED_PARAMS, SharedParams
 from rail.core.data import TableLike
 from rail.estimation.estimator import CatEstimator
 from rail.estimation.informer import CatInformer
+from rail.utils.histogram_utils import uniform_bin_index
 
 
 class trainZmodel:
@@ -48,14 +49,14 @@ class TrainZInformer(CatInformer):
         else:  # pragma: no cover
             training_data = self.get_data("input")
         zbins = np.linspace(self.config.zmin, self.config.zmax, self.config.nzbins + 1)
-        speczs = np.sort(training_data[self.config.redshift_col])
-        train_pdf, _ = np.histogram(speczs, zbins)
+        # the bins are even, so there is no need to sort or search the edges
+        spec_bin = uniform_bin_index(training_data[self.config.redshift_col], zbins)
+        train_pdf = np.bincount(
+            spec_bin[spec_bin >= 0], minlength=self.config.nzbins
+        ).astype(float)
         midpoints = zbins[:-1] + np.diff(zbins) / 2
         zmode = midpoints[np.argmax(train_pdf)]
-        cdf = np.cumsum(train_pdf)
-        cdf = cdf / cdf[-1]
-        norm = cdf[-1] * (zbins[2] - zbins[1])
-        train_pdf = train_pdf / norm
+        train_pdf /= zbins[2] - zbins[1]
         zgrid = midpoints
         self.model = trainZmodel(zgrid, train_pdf, zmode)
         self.add_data("model", self.model)
@@ -88,6 +89,7 @@ class TrainZEstimator(CatEstimator):
     def __init__(self, args: Any, **kwargs: Any) -> None:
         self.zgrid: np.ndarray | None = None
         self.train_pdf: np.ndarray | None = None
+        self.norm_pdf: np.ndarray | None = None
         self.zmode: np.ndarray | None = None
         CatEstimator.__init__(self, args, **kwargs)
 
@@ -98,17 +100,25 @@ class TrainZEstimator(CatEstimator):
         self.zgrid = self.model.zgrid
         self.train_pdf = self.model.pdf
         self.zmode = self.model.zmode
+        # normalize the p(z) once here, rather than having qp do it per chunk
+        template = qp.Ensemble(
+            qp.interp, data=dict(xvals=self.zgrid, yvals=self.train_pdf[None, :])
+        )
+        self.norm_pdf = np.ravel(template.objdata["yvals"])
 
     def _process_chunk(
         self, start: int, end: int, data: TableLike, first: bool
     ) -> None:
         test_size = end - start
         assert self.zmode is not None
-        assert self.train_pdf is not None
-        zmode = np.repeat(self.zmode, test_size)
+        assert self.norm_pdf is not None
+        # every object gets the same, already normalized, p(z), so pass
+        # read-only broadcast views rather than copies
+        zmode = np.broadcast_to(self.zmode, test_size)
+        yvals = np.broadcast_to(self.norm_pdf, (test_size, self.norm_pdf.size))
         qp_d = qp.Ensemble(
             qp.interp,
-            data=dict(xvals=self.zgrid, yvals=np.tile(self.train_pdf, (test_size, 1))),
+            data=dict(xvals=self.zgrid, yvals=yvals, norm=False),
         )
         qp_d.set_ancil(dict(zmode=zmode))
         self._do_chunk_output(qp_d, start, end, first, data=data)
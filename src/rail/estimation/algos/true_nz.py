@@ -11,6 +11,73 @@ from ceci.config import StageParameter as Param
 from rail.core.common_params import SHARED_PARAMS, SharedParams
 from rail.core.data import PqHandle, QPHandle, TableHandle, TableLike
 from rail.core.stage import RailStage
+from rail.utils.histogram_utils import uniform_bin_index
+from rail.utils.numba_utils import HAS_NUMBA, njit, prange
+
+# number of objects each thread of the histogram kernel handles at a time
+_BLOCK_SIZE = 65536
+
+
+@njit(parallel=True, cache=True)
+def _hist_kernel(
+    zb: np.ndarray, mask: np.ndarray, edges: np.ndarray
+) -> np.ndarray:  # pragma: no cover
+    # same arithmetic as uniform_bin_index, but masking, binning and counting
+    # happen in one pass, with a sub-histogram per block to avoid races
+    nbins = edges.size - 1
+    scale = nbins / (edges[-1] - edges[0])
+    use_mask = mask.size > 0
+    nblocks = (zb.size + _BLOCK_SIZE - 1) // _BLOCK_SIZE
+    local = np.zeros((nblocks, nbins), dtype=np.int64)
+    for b in prange(nblocks):
+        for i in range(b * _BLOCK_SIZE, min((b + 1) * _BLOCK_SIZE, zb.size)):
+            if use_mask and not mask[i]:
+                continue
+            val = zb[i]
+            if np.isnan(val) or val < edges[0] or val > edges[-1]:
+                continue
+            idx = min(int((val - edges[0]) * scale), nbins - 1)
+            if val < edges[idx]:
+                idx -= 1
+            if idx < nbins - 1 and val >= edges[idx + 1]:
+                idx += 1
+            local[b, idx] += 1
+    return local.sum(axis=0)
+
+
+def _histogram_chunk(
+    zb: np.ndarray, mask: np.ndarray | None, edges: np.ndarray
+) -> np.ndarray:
+    """Histogram the selected redshifts of a chunk on an even grid
+
+    Parameters
+    ----------
+    zb : np.ndarray
+        The redshifts of the objects in the chunk
+    mask : np.ndarray | None
+        Which objects to use, None to use all of them
+    edges : np.ndarray
+        The evenly spaced bin edges
+
+    Returns
+    -------
+    np.ndarray
+        The counts in each bin, binned like ``np.histogram(zb, bins=edges)``
+    """
+    if HAS_NUMBA:
+        # the kernel needs native byte order, so this may make a copy
+        zb = np.ascontiguousarray(np.ravel(zb), dtype=np.float64)
+        if mask is None:
+            mask = np.empty(0, dtype=bool)
+        counts = _hist_kernel(zb, np.ravel(mask), edges)
+    else:  # pragma: no cover
+        # flag unselected objects like out of range ones, rather than copying
+        # out the selected redshifts
+        z_bin = uniform_bin_index(zb, edges)
+        if mask is not None:
+            z_bin[~np.ravel(mask)] = -1
+        counts = np.bincount(z_bin[z_bin >= 0], minlength=edges.size - 1)
+    return counts
 
 
 class TrueNZHistogrammer(RailStage):
@@ -40,6 +107,14 @@ class TrueNZHistogrammer(RailStage):
         self.bincents: np.ndarray | None = None
 
     def _setup_iterator(self) -> Generator:
+        if self.config.selected_bin < 0:
+            # no selection, so there is no need to read the tomography bins,
+            # and a mask of None means use every object
+            itr = self.input_iterator("input", groupname=self.config.hdf5_groupname)
+            for s, e, d in itr:
+                yield s, e, d, None
+            return
+
         itrs = [
             self.input_iterator("input", groupname=self.config.hdf5_groupname),
             self.input_iterator("tomography_bins", groupname=""),
@@ -55,10 +130,7 @@ class TrueNZHistogrammer(RailStage):
                     pz_data = d
                     first = False
                 else:
-                    if self.config.selected_bin < 0:
-                        mask = np.ones(e - s, dtype=bool)
-                    else:
-                        mask = d["class_id"] == self.config.selected_bin
+                    mask = d["class_id"] == self.config.selected_bin
             yield start, end, pz_data, mask  # pylint: disable=possibly-used-before-assignment
 
     def run(self) -> None:
@@ -77,7 +149,11 @@ class TrueNZHistogrammer(RailStage):
             self._process_chunk(s, e, data, mask, first, single_hist)
             first = False
         if self.comm is not None:  # pragma: no cover
-            single_hist = self.comm.reduce(single_hist)
+            # sum onto rank 0 with a buffer reduction, rather than pickling
+            summed_hist = np.empty_like(single_hist) if self.rank == 0 else None
+            self.comm.Reduce(single_hist, summed_hist, root=0)
+            if summed_hist is not None:
+                single_hist = summed_hist
 
         if self.rank == 0:
             n_total = single_hist.sum()
@@ -93,14 +169,14 @@ class TrueNZHistogrammer(RailStage):
         _start: int,
         _end: int,
         data: TableLike,
-        mask: np.ndarray,
+        mask: np.ndarray | None,
         _first: bool,
         single_hist: np.ndarray,
     ) -> None:
-        squeeze_mask = np.squeeze(mask)
-        zb = data[self.config.redshift_col][squeeze_mask]
         assert self.zgrid is not None
-        single_hist += np.histogram(zb, bins=self.zgrid)[0]
+        single_hist += _histogram_chunk(
+            data[self.config.redshift_col], mask, self.zgrid
+        )
 
     def histogram(self, catalog: TableLike, tomo_bins: TableLike, **kwargs) -> PqHandle:
         """The main interface method for ``TrueNZHistogrammer``.
@@ -3,6 +3,8 @@ A classifier that uses pz point estimate to assign
 tomographic bins with uniform binning.
 """
 
+from typing import Any
+
 import numpy as np
 import qp
 from ceci.config import StageParameter as Param
@@ -10,6 +12,10 @@ from ceci.config import StageParameter as Param
 from rail.core.data import Hdf5Handle
 from rail.core.common_params import SharedParams
 from rail.estimation.classifier import PZClassifier
+from rail.utils.histogram_utils import uniform_bin_index
+
+# with up to this many custom bin edges, bins are found by counting edges
+_MAX_COUNTED_EDGES = 32
 
 
 class UniformBinningClassifier(PZClassifier):
@@ -41,6 +47,30 @@ class UniformBinningClassifier(PZClassifier):
 
     outputs = [("output", Hdf5Handle)]
 
+    def __init__(self, args: Any, **kwargs: Any) -> None:
+        super().__init__(args, **kwargs)
+        self.zbin_edges: np.ndarray | None = None
+        self.even_bins = True
+        self.class_id_dtype: type = np.int32
+
+    def run(self) -> None:
+        # the bin edges are the same for every chunk, so set them up once
+        self.even_bins = len(self.config.zbin_edges) < 2
+        if not self.even_bins:
+            self.zbin_edges = np.asarray(self.config.zbin_edges, dtype=float)
+        else:
+            self.zbin_edges = np.linspace(
+                self.config.zmin, self.config.zmax, self.config.n_tom_bins + 1
+            )
+        # the bin indices are small, so write them in the smallest type we can
+        self.class_id_dtype = self._class_id_dtype(
+            len(self.zbin_edges) - 1, self.config.no_assign
+        )
+        if self.config.object_id_col == "":
+            # ID set to row index
+            self.config.object_id_col = "row_index"
+        PZClassifier.run(self)
+
     def _process_chunk(
         self, start: int, end: int, data: qp.Ensemble, first: bool
     ) -> None:
@@ -77,37 +107,45 @@ class UniformBinningClassifier(PZClassifier):
             ) from missing_key
 
         # binning options
-        if len(self.config.zbin_edges) >= 2:
+        zbin_edges = self.zbin_edges
+        assert zbin_edges is not None
+        if not self.even_bins:
             # this overwrites all other key words
             # linear binning defined by zmin, zmax, and n_tom_bins
-            bin_index = np.digitize(zb, self.config.zbin_edges)
+            if len(zbin_edges) <= _MAX_COUNTED_EDGES and np.all(
+                np.diff(zbin_edges) > 0
+            ):
+                # for a few increasing edges, counting the edges at or below
+                # each value gives the np.digitize index faster than its search
+                bin_index = np.zeros(np.shape(zb), dtype=self.class_id_dtype)
+                for edge in zbin_edges:
+                    bin_index += zb >= edge
+            else:
+                bin_index = np.digitize(zb, zbin_edges).astype(self.class_id_dtype)
             # assign -99 to objects not in any bin:
-            bin_index[bin_index == 0] = self.config.no_assign
-            bin_index[bin_index == len(self.config.zbin_edges)] = self.config.no_assign
+            bin_index[(bin_index == 0) | (bin_index == len(zbin_edges))] = (
+                self.config.no_assign
+            )
         else:
-            # linear binning defined by zmin, zmax, and n_tom_bins
-            bin_index = np.digitize(
-                zb,
-                np.linspace(
-                    self.config.zmin, self.config.zmax, self.config.n_tom_bins + 1
-                ),
+            # linear binning defined by zmin, zmax, and n_tom_bins, the bins are
+            # even so the index comes from the bin width, not a search
+            raw_index = uniform_bin_index(zb, zbin_edges)
+            # assign -99 to objects not in any bin, np.digitize also leaves
+            # zmax itself out of the last bin
+            outside = (raw_index < 0) | (np.ravel(zb) == zbin_edges[-1])
+            bin_index = (
+                np.where(outside, self.config.no_assign, raw_index + 1)
+                .astype(self.class_id_dtype)
+                .reshape(np.shape(zb))
             )
-            # assign -99 to objects not in any bin:
-            bin_index[bin_index == 0] = self.config.no_assign
-            bin_index[bin_index == (self.config.n_tom_bins + 1)] = self.config.no_assign
-
-        if self.config.object_id_col != "":
-            # below is commented out and replaced by a redundant line
-            # because the data doesn't have ID yet
-            # obj_id = data[self.config.object_id_col]
-            obj_id = np.arange(data.npdf)
-        elif self.config.object_id_col == "":
-            # ID set to row index
-            obj_id = np.arange(data.npdf)
-            self.config.object_id_col = "row_index"
+
+        # below is commented out and replaced by the row index
+        # because the data doesn't have ID yet
+        # obj_id = data[self.config.object_id_col]
+        obj_id = np.arange(start, end)
 
         class_id = {
-            self.config.object_id_col: obj_id,  # pylint: disable=possibly-used-before-assignment
+            self.config.object_id_col: obj_id,
             "class_id": bin_index,
         }
         self._do_chunk_output(class_id, start, end, first)
@@ -8,15 +8,87 @@ import numpy as np
 import qp
 from ceci.config import StageParameter as Param
 from scipy.special import digamma
-from scipy.stats import dirichlet
 
 from rail.core.data import QPHandle
 from rail.core.common_params import SharedParams
 from rail.estimation.informer import PzInformer
 from rail.estimation.summarizer import PZSummarizer
+from rail.utils.histogram_utils import normalize_stack
+from rail.utils.numba_utils import HAS_NUMBA, njit, prange
 
 TEENY = 1.0e-15
 
+# number of galaxies the responsibility sums handle at a time
+_BLOCK_SIZE = 1024
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _responsibility_sums(
+    log_pdf_vals: np.ndarray, dig: np.ndarray
+) -> np.ndarray:  # pragma: no cover
+    # sum over galaxies of exp(dig + log p(z)), normalized per galaxy, i.e., a
+    # softmax, so subtract the row maximum before the exp to keep it in range;
+    # each block of galaxies accumulates into its own row of local, so no races;
+    # fastmath lets the compiler assume there are no infinities, so the row
+    # maximum starts from the first value rather than from -inf
+    ngal, nzbins = log_pdf_vals.shape
+    nblocks = (ngal + _BLOCK_SIZE - 1) // _BLOCK_SIZE
+    local = np.zeros((nblocks, nzbins))
+    for b in prange(nblocks):
+        row = np.empty(nzbins)
+        for i in range(b * _BLOCK_SIZE, min((b + 1) * _BLOCK_SIZE, ngal)):
+            row[0] = dig[0] + log_pdf_vals[i, 0]
+            row_max = row[0]
+            for k in range(1, nzbins):
+                row[k] = dig[k] + log_pdf_vals[i, k]
+                row_max = max(row_max, row[k])
+            total = 0.0
+            for k in range(nzbins):
+                row[k] = np.exp(row[k] - row_max)
+                total += row[k]
+            for k in range(nzbins):
+                local[b, k] += row[k] / total
+    return local.sum(axis=0)
+
+
+def _responsibility_sums_numpy(log_pdf_vals: np.ndarray, dig: np.ndarray) -> np.ndarray:
+    """Numpy version of `_responsibility_sums`, for when numba is missing
+
+    The galaxies are processed in blocks, so that the work buffers stay in
+    cache between the passes over them.
+
+    Parameters
+    ----------
+    log_pdf_vals : np.ndarray
+        log p(z) of the galaxies, shape (ngal, nzbins)
+    dig : np.ndarray
+        The expected log n(z) from the current Dirichlet parameters
+
+    Returns
+    -------
+    np.ndarray
+        The responsibilities summed over galaxies, for each bin
+    """
+    ngal, nzbins = log_pdf_vals.shape
+    dig = dig.astype(log_pdf_vals.dtype)
+    nk_partial = np.zeros(nzbins)
+    work = np.empty((min(_BLOCK_SIZE, ngal), nzbins), dtype=log_pdf_vals.dtype)
+    row_vals = np.empty((work.shape[0], 1), dtype=log_pdf_vals.dtype)
+    for start in range(0, ngal, _BLOCK_SIZE):
+        block = log_pdf_vals[start : start + _BLOCK_SIZE]
+        nrow = block.shape[0]
+        matrix_grid = work[:nrow]
+        # a softmax over each row, shifted by the row maximum so that the exp
+        # stays in range; row_vals holds the row maxima then the row sums
+        np.add(dig, block, out=matrix_grid)
+        np.max(matrix_grid, axis=1, keepdims=True, out=row_vals[:nrow])
+        np.subtract(matrix_grid, row_vals[:nrow], out=matrix_grid)
+        np.exp(matrix_grid, out=matrix_grid)
+        np.sum(matrix_grid, axis=1, keepdims=True, out=row_vals[:nrow])
+        np.divide(matrix_grid, row_vals[:nrow], out=matrix_grid)
+        nk_partial += np.sum(matrix_grid, axis=0, dtype=np.float64)
+    return nk_partial
+
 
 class VarInfStackInformer(PzInformer):
     """Placeholder Informer"""
@@ -48,7 +120,17 @@ class VarInfStackSummarizer(PZSummarizer):
         nzbins=SharedParams.copy_param("nzbins"),
         seed=Param(int, 87, msg="random seed"),
         n_iter=Param(
-            int, 100, msg="The number of iterations in the variational inference"
+            int,
+            100,
+            msg="The maximum number of iterations in the variational inference",
+        ),
+        tol=Param(
+            float,
+            1.0e-4,
+            msg="Stop iterating once the largest change in the Dirichlet "
+            "parameters, relative to the largest parameter, is below this. "
+            "Set to 0 to always run all n_iter iterations, as was done before "
+            "this option was added; stopping early changes the output slightly",
         ),
         n_samples=Param(
             int, 500, msg="The number of samples used in dirichlet uncertainty"
@@ -118,15 +200,29 @@ class VarInfStackSummarizer(PZSummarizer):
             # qp_d = qp.Ensemble(qp.interp, data=dict(xvals=self.zgrid, yvals=alpha_trace))
             # instead, sample and save the samples
             rng = np.random.default_rng(seed=self.config.seed)
-            sample_pz = dirichlet.rvs(
-                alpha_trace, size=self.config.n_samples, random_state=rng
+            # draw the Dirichlet samples as normalized gamma variates, which is
+            # what dirichlet.rvs does for alpha >= 1, without its overhead;
+            # the gammas are drawn before alpha_trace is normalized (on a
+            # copy) and are then normalized in place, as qp.interp would do
+            sample_pz = rng.standard_gamma(
+                alpha_trace, size=(self.config.n_samples, alpha_trace.size)
             )
             qp_d = qp.Ensemble(
-                qp.interp, data=dict(xvals=self.zgrid, yvals=alpha_trace)
+                qp.interp,
+                data=dict(
+                    xvals=self.zgrid,
+                    yvals=normalize_stack(alpha_trace[None, :].copy(), self.zgrid),
+                    norm=False,
+                ),
             )
 
             sample_ens = qp.Ensemble(
-                qp.interp, data=dict(xvals=self.zgrid, yvals=sample_pz)
+                qp.interp,
+                data=dict(
+                    xvals=self.zgrid,
+                    yvals=normalize_stack(sample_pz, self.zgrid),
+                    norm=False,
+                ),
             )
             self.add_data("output", sample_ens)
             self.add_data("single_NZ", qp_d)
@@ -143,20 +239,40 @@ class VarInfStackSummarizer(PZSummarizer):
         assert self.zgrid is not None
         alpha_trace = np.ones(len(self.zgrid))
         init_trace = np.ones(len(self.zgrid))
-        pdf_vals = test_data.pdf(self.zgrid)
-        log_pdf_vals = np.log(np.array(pdf_vals) + TEENY)
+        if test_data.gen_class is qp.interp and np.array_equal(
+            np.ravel(test_data.metadata["xvals"]), self.zgrid
+        ):
+            # the p(z) are already tabulated on zgrid, no need to interpolate
+            pdf_vals = np.atleast_2d(test_data.objdata["yvals"])
+        else:
+            pdf_vals = test_data.pdf(self.zgrid)
+        # the (ngal, nzbins) matrices are streamed every iteration, so keep them
+        # in float32 to halve the memory traffic, and in row order, which is
+        # how the responsibility sums walk them; alpha_trace and the per-bin
+        # sums stay in float64; np.array always copies, so the log can be taken
+        # in place without touching the input ensemble
+        log_pdf_vals = np.array(pdf_vals, dtype=np.float32, order="C")
+        np.add(log_pdf_vals, np.float32(TEENY), out=log_pdf_vals)
+        np.log(log_pdf_vals, out=log_pdf_vals)
+        if self.comm is not None:  # pragma: no cover
+            # receive buffer for the buffer-based reduction across ranks
+            nk = np.empty(len(self.zgrid))
+        dig = np.empty(len(self.zgrid))
         for _ in range(self.config.n_iter):
-            dig = np.array(
-                [digamma(kk) - digamma(np.sum(alpha_trace)) for kk in alpha_trace]
-            )
-            matrix_grid = np.exp(dig + log_pdf_vals)
-            gamma_matrix = np.array([kk / np.sum(kk) for kk in matrix_grid])
-            for kk in matrix_grid:
-                break
-            nk_partial = np.sum(gamma_matrix, axis=0)
+            digamma(alpha_trace, out=dig)
+            dig -= digamma(alpha_trace.sum())
+            if HAS_NUMBA:
+                nk_partial = _responsibility_sums(log_pdf_vals, dig)
+            else:  # pragma: no cover
+                nk_partial = _responsibility_sums_numpy(log_pdf_vals, dig)
             if self.comm is not None:  # pragma: no cover
-                nk = self.comm.allreduce(nk_partial)
+                self.comm.Allreduce(nk_partial, nk)
             else:
                 nk = nk_partial
+            prev_trace = alpha_trace
             alpha_trace = nk + init_trace
+            # nk is summed over all the ranks, so they all stop together
+            delta = np.max(np.abs(alpha_trace - prev_trace)) / np.max(prev_trace)
+            if delta < self.config.tol:
+                break
         return alpha_trace
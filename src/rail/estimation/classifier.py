@@ -2,11 +2,12 @@
 Abstract base classes defining classifiers.
 """
 
-import gc
 from typing import Any
 
+import numpy as np
 import qp
 
+from rail.core.chunked_run import ChunkedRunMixin
 from rail.core.common_params import SHARED_PARAMS, SharedParams
 from rail.core.data import (
     DataHandle,
@@ -80,7 +81,7 @@ class CatClassifier(RailStage):  # pragma: no cover
         return self.get_handle("output")
 
 
-class PZClassifier(RailStage):
+class PZClassifier(RailStage, ChunkedRunMixin):
     """The base class for assigning classes (tomographic bins) to per-galaxy PZ
     estimates.
 
@@ -147,6 +148,36 @@ class PZClassifier(RailStage):
             # update output handle assuming that the data is in a dictionary format
             self._output_handle.set_data(self._partial_output)
 
+    @staticmethod
+    def _class_id_dtype(n_classes: int, no_assign: int) -> type:
+        """Pick the smallest integer type that can hold the class ids
+
+        Parameters
+        ----------
+        n_classes
+            The number of classes, the ids run from 1 to n_classes
+
+        no_assign
+            The flag value for objects not assigned to any class
+
+        Returns
+        -------
+        type
+            np.int16 if the ids and the flag fit in it, otherwise np.int32
+
+        Notes
+        -----
+        Binning by edges gives n_classes + 1 for objects above the last edge
+        before they are flagged with no_assign, so that has to fit as well.
+        """
+        int16_info = np.iinfo(np.int16)
+        if (
+            n_classes + 1 <= int16_info.max
+            and int16_info.min <= no_assign <= int16_info.max
+        ):
+            return np.int16
+        return np.int32
+
     def _process_chunk(
         self, start: int, end: int, data: qp.Ensemble, first: bool
     ) -> None:
@@ -217,16 +248,6 @@ class PZClassifier(RailStage):
         The _process_chunk method should be implemented by subclasses to define
         the specific classification logic.
         """
-        test_data = self.get_data("input")
-
         iterator = self.input_iterator("input")
-        first = True
-
-        for start, end, test_data in iterator:
-            # print(f"Process {self.rank} running estimator on chunk {start} - {end}")
-            self._process_chunk(start, end, test_data, first)
-            first = False
-            # Running garbage collection manually seems to be needed
-            # to avoid memory growth for some estimators
-            gc.collect()
+        self._run_chunks(iterator)
         self._finalize_run()
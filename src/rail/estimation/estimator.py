@@ -2,14 +2,16 @@
 Abstract base classes defining Estimators of individual galaxy redshift uncertainties.
 """
 
-import gc
-import sys
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Optional
 
 import numpy as np
 import qp
 import tables_io
+from tables_io import hdf5 as tab_hdf5
 
+from rail.core.chunked_run import ChunkedRunMixin
 from rail.core.common_params import SHARED_PARAMS, SharedParams
 from rail.core.data import (
     DataHandle,
@@ -29,7 +31,7 @@ from .informer import (  # pylint: disable=unused-import, relative-beyond-top-le
 )
 
 
-class CatEstimator(RailStage, PointEstimationMixin):
+class CatEstimator(RailStage, PointEstimationMixin, ChunkedRunMixin):
     """The base class for making photo-z posterior estimates from catalog-like inputs
     (i.e., tables with fluxes in photometric bands among the set of columns)
 
@@ -66,6 +68,8 @@ class CatEstimator(RailStage, PointEstimationMixin):
         self._output_handle: QPHandle | None = None
         self.model = None
         self._partial_output = {}  # TODO: make this an ordered dict?
+        self._write_executor: ThreadPoolExecutor | None = None
+        self._pending_write: Future | None = None
 
     def estimate(self, input_data: TableLike, **kwargs) -> QPHandle:
         """The main interface method for the photo-z estimation
@@ -109,23 +113,118 @@ class CatEstimator(RailStage, PointEstimationMixin):
     def run(self) -> None:
         self.open_model(**self.config)
 
-        iterator = self.input_iterator("input")
-        first = True
+        iterator = self.input_iterator("input", chunk_size=self._align_chunk_size())
         self._initialize_run()
         self._output_handle = None
-        for s, e, test_data in iterator:
-            print(f"Process {self.rank} running estimator on chunk {s:,} - {e:,}")
-            self._process_chunk(s, e, test_data, first)
-            first = False
-            # Running garbage collection manually seems to be needed
-            # to avoid memory growth for some estimators
-            gc.collect()
+        try:
+            self._run_chunks(iterator, label="estimator")
+        finally:
+            self._finish_chunk_writes()
         self._finalize_run()
 
+    def _write_chunk_in_background(
+        self, handle: DataHandle, start: int, end: int
+    ) -> None:
+        """Write the data a handle holds as rows start to end, in a background thread
+
+        The handle writes whatever data it holds, so call
+        `_wait_for_chunk_write` before giving it the data for the next chunk.
+
+        Under MPI the chunk is written right away instead: the output file
+        is then opened with MPI-IO, and calling into MPI from a second thread
+        is only safe if MPI was initialized with ``MPI_THREAD_MULTIPLE``.
+        """
+        if self.comm is not None:  # pragma: no cover
+            handle.write_chunk(start, end)
+            return
+        if self._write_executor is None:
+            self._write_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_write = self._write_executor.submit(
+            handle.write_chunk, start, end
+        )
+
+    def _wait_for_chunk_write(self) -> None:
+        """Wait for the last chunk written in the background, re-raising its errors"""
+        pending, self._pending_write = self._pending_write, None
+        if pending is not None:
+            pending.result()
+
+    def _finish_chunk_writes(self) -> None:
+        """Wait for the last chunk write and shut down the writer thread"""
+        try:
+            self._wait_for_chunk_write()
+        finally:
+            if self._write_executor is not None:
+                self._write_executor.shutdown()
+                self._write_executor = None
+
+    def _align_chunk_size(self) -> int:
+        """Round chunk_size down to a multiple of the input's HDF5 chunking
+
+        If the input file is an HDF5 file whose datasets are chunked on disk,
+        reading row ranges that straddle the on-disk chunks makes HDF5 read
+        (and decompress) the same chunks more than once.  The configured
+        chunk_size is never exceeded, and is used as is for inputs that are in
+        memory, not HDF5 or not chunked, or if one disk chunk does not fit in it.
+
+        If there are more processes than chunks the size is first reduced
+        with `_chunk_size_for_ranks`, as `input_iterator` would, and then
+        aligned, so the per-process reads also line up with the disk chunks.
+        The config itself is never modified.
+
+        Returns
+        -------
+        int
+            The number of rows to read per chunk
+        """
+        chunk_size = self.config.chunk_size
+        handle = self.get_handle("input", allow_missing=True)
+        if handle.path in [None, "None", "none"] or not os.path.isfile(handle.path):
+            return chunk_size
+        try:
+            group, infp = tab_hdf5.read_HDF5_group(
+                handle.path, groupname=self.config.hdf5_groupname or None
+            )
+        except (OSError, KeyError):
+            # not an HDF5 file, e.g., parquet, or no such group; either way
+            # leave it to the iterator to deal with
+            return chunk_size
+        try:
+            n_rows = max(
+                (
+                    dset.shape[0]
+                    for dset in group.values()
+                    if getattr(dset, "shape", None)
+                ),
+                default=0,
+            )
+            disk_chunk_rows = max(
+                (
+                    dset.chunks[0]
+                    for dset in group.values()
+                    if getattr(dset, "chunks", None)
+                ),
+                default=0,
+            )
+        finally:
+            infp.close()
+        chunk_size = self._chunk_size_for_ranks(n_rows, chunk_size)
+        if disk_chunk_rows <= 0 or disk_chunk_rows > chunk_size:
+            return chunk_size
+        aligned = chunk_size // disk_chunk_rows * disk_chunk_rows
+        if aligned != chunk_size:
+            print(
+                f"Reading chunks of {aligned} rows to match the {disk_chunk_rows} "
+                "row chunks of the input file"
+            )
+        return aligned
+
     def _initialize_run(self) -> None:
         self._output_handle = None
 
     def _finalize_run(self) -> None:
+        # in case a subclass runs its own chunk loop
+        self._finish_chunk_writes()
         assert self._output_handle is not None
         if self.config.output_mode != "return":
             self._output_handle.finalize_write()
@@ -171,36 +270,59 @@ class CatEstimator(RailStage, PointEstimationMixin):
         self,
         qp_dstn: qp.Ensemble,
     ) -> qp.Ensemble:
+        """Attach summary statistics of the p(z) to the ensemble ancil
+
+        Parameters
+        ----------
+        qp_dstn : qp.Ensemble
+            The p(z) of a chunk of objects
 
+        Returns
+        -------
+        qp.Ensemble
+            The same ensemble, with the ``z_q2p5``, ``z_q16``, ``z_median``,
+            ``z_q84``, ``z_q97p5``, ``z_mode``, ``z_mean`` and ``z_std``
+            ancil entries
+
+        Notes
+        -----
+        The upper 97.5% quantile used to be stored as ``z_97p5``.  That key is
+        deprecated, and for now is still attached as an alias of ``z_q97p5``.
+        """
         if qp_dstn.ancil is None:  # pragma: no cover
             ancil_dict: dict[str, np.ndarray] = dict()
             qp_dstn.set_ancil(ancil_dict)
 
         quantiles = [0.025, 0.16, 0.5, 0.85, 0.975]
-        quant_names = ["q2p5", "q16", "median", "q84", "97p5"]
+        quant_names = ["q2p5", "q16", "median", "q84", "q97p5"]
 
-        locs = qp_dstn.ppf(quantiles)
-        for name_, vals_ in zip(quant_names, locs.T):
-            qp_dstn.ancil[f"z_{name_}"] = np.expand_dims(vals_, -1)
+        # (npdf, nquant, 1), so each column below is a (npdf, 1) view
+        locs = np.atleast_2d(qp_dstn.ppf(quantiles))[..., np.newaxis]
+        qp_dstn.ancil.update(
+            {f"z_{name_}": locs[:, i] for i, name_ in enumerate(quant_names)}
+        )
+        # deprecated name of z_q97p5, kept for existing readers of the output
+        qp_dstn.ancil["z_97p5"] = qp_dstn.ancil["z_q97p5"]
 
-        grid: np.ndarray | None = None
+        grid = self._default_point_estimate_grid()
 
         if "z_mode" not in qp_dstn.ancil:
-            grid = np.linspace(self.config.zmin, self.config.zmax, self.config.nzbins)
             qp_dstn.ancil["z_mode"] = qp_dstn.mode(grid)
 
         try:
             qp_dstn.ancil["z_mean"] = qp_dstn.mean()
             qp_dstn.ancil["z_std"] = qp_dstn.std()
         except IndexError:  # pragma: no cover
-            # this is needed b/c qp.MixMod pdf sometimes fails to compute moments
-            grid = np.linspace(self.config.zmin, self.config.zmax, self.config.nzbins)
-            pdfs = qp_dstn.pdf(grid)
+            # this is needed b/c qp.MixMod pdf sometimes fails to compute moments;
+            # gridded() reuses the p(z) values from the mode; the variance is
+            # taken about the mean, as E[z^2] - mean^2 cancels badly for
+            # narrow p(z) at high z
+            _, pdfs = qp_dstn.gridded(grid)
+            pdfs = np.atleast_2d(pdfs)
             norms = pdfs.sum(axis=1)
-            means = np.sum(pdfs * grid, axis=1) / norms
-            diffs = (np.expand_dims(grid, -1) - means).T
-            wt_diffs = diffs * diffs * pdfs
-            stds = np.sqrt((wt_diffs).sum(axis=1) / norms)
+            means = (pdfs @ grid) / norms
+            diffs = grid - means[:, np.newaxis]
+            stds = np.sqrt((diffs * diffs * pdfs).sum(axis=1) / norms)
             qp_dstn.ancil["z_mean"] = np.expand_dims(means, -1)
             qp_dstn.ancil["z_std"] = np.expand_dims(stds, -1)
 
@@ -248,9 +370,12 @@ class CatEstimator(RailStage, PointEstimationMixin):
                     self._input_length, communicator=self.comm
                 )
         assert self._output_handle is not None
+        # the handle writes whatever data it holds, so the previous chunk has
+        # to be written out before its data is replaced
+        self._wait_for_chunk_write()
         self._output_handle.set_data(qp_dstn, partial=True)
         if self.config.output_mode != "return":
-            self._output_handle.write_chunk(start, end)
+            self._write_chunk_in_background(self._output_handle, start, end)
         elif self.config.output_mode == "return":
             self._partial_output[(start, end)] = qp_dstn
         return qp_dstn
@@ -270,7 +395,7 @@ class CatEstimator(RailStage, PointEstimationMixin):
         return out_data
 
 
-class PzEstimator(RailStage, PointEstimationMixin):
+class PzEstimator(RailStage, PointEstimationMixin, ChunkedRunMixin):
     """The base class for making photo-z posterior estimates from other pz inputs
 
     Estimators use a generic "model", the details of which depends on the sub-class.
@@ -334,17 +459,9 @@ class PzEstimator(RailStage, PointEstimationMixin):
         self.open_model(**self.config)
 
         iterator = self.input_iterator("input")
-        first = True
         self._initialize_run()
         self._output_handle = None
-        for s, e, test_data in iterator:
-            print(f"Process {self.rank} running estimator on chunk {s:,} - {e:,}")
-            sys.stdout.flush()
-            self._process_chunk(s, e, test_data, first)
-            first = False
-            # Running garbage collection manually seems to be needed
-            # to avoid memory growth for some estimators
-            gc.collect()
+        self._run_chunks(iterator, label="estimator")
         self._finalize_run()
 
     def _initialize_run(self) -> None:
@@ -2,7 +2,7 @@
 Abstract base classes defining Summarizers of the redshift distribution of an ensemble of galaxies
 """
 
-from typing import Any
+from typing import Any, Callable, Generator
 
 import numpy as np
 import qp
@@ -106,26 +106,102 @@ class PZSummarizer(RailStage):
         self.finalize()
         return self.get_handle("output")
 
-    def _broadcast_bootstrap_matrix(self) -> np.ndarray | None:
-        rng = np.random.default_rng(seed=self.config.seed)
-        # Only one of the nodes needs to produce the bootstrap indices
+    def _selected_bin_iterator(self, unmasked: Callable[[], Generator]) -> Generator:
+        """Iterate the input along with a mask of the objects in the selected bin
+
+        This is the `_setup_iterator` of the masked summarizers, which take a
+        "tomography_bins" table alongside the p(z) and a `selected_bin` config.
+
+        Parameters
+        ----------
+        unmasked : Callable[[], Generator]
+            The `_setup_iterator` of the unmasked summarizer, used when no bin
+            is selected
+
+        Returns
+        -------
+        Generator
+            Yields (start, end, data, mask) for each chunk
+        """
+        selected_bin = self.config.selected_bin
+        if self.config.tomography_bins in ["none", None]:
+            selected_bin = -1
+
+        if selected_bin == -1:
+            # nothing to select on, so iterate like the unmasked summarizer
+            yield from unmasked()
+            return
+
+        itrs = [
+            self.input_iterator("input"),
+            self.input_iterator("tomography_bins"),
+        ]
+
+        for it in zip(*itrs):
+            first = True
+            mask = None
+            for s, e, d in it:
+                if first:
+                    start = s
+                    end = e
+                    pz_data = d
+                    first = False
+                else:
+                    mask = d["class_id"] == self.config.selected_bin
+            if mask is None:
+                mask = np.ones(
+                    pz_data.npdf,  # pylint: disable=possibly-used-before-assignment
+                    dtype=bool,
+                )
+            yield start, end, pz_data, mask  # pylint: disable=possibly-used-before-assignment
+
+    def _chunk_bootstrap_draws(
+        self, start: int, end: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Draw the part of the bootstrap samples that lands in the chunk [start, end)
+
+        Each of the n_samples bootstrap samples draws ngal objects with
+        replacement, so the number of draws from this chunk is
+        Binomial(ngal, (end - start) / ngal), and the draws themselves are
+        uniform within the chunk.  This avoids building (and broadcasting)
+        the full (ngal, n_samples) bootstrap matrix.
+
+        The random numbers are seeded with (seed, start), so the result does
+        not depend on which process handles the chunk.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first object in the chunk
+        end : int
+            Index one past the last object in the chunk
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The sample each draw belongs to, sorted by sample, and the index
+            of the drawn object relative to the start of the chunk
+        """
         ngal = self._input_length
-        if self.rank == 0:
-            bootstrap_matrix = rng.integers(
-                low=0, high=ngal, size=(ngal, self.config.n_samples)
-            )
-        else:  # pragma: no cover
-            bootstrap_matrix = None
-        if self.comm is not None:  # pragma: no cover
-            self.comm.Barrier()
-            bootstrap_matrix = self.comm.bcast(bootstrap_matrix, root=0)
-        return bootstrap_matrix
+        nobj = end - start
+        rng = np.random.default_rng([self.config.seed, start])
+        counts = rng.binomial(ngal, nobj / ngal, size=self.config.n_samples)
+        sample_ids = np.repeat(np.arange(self.config.n_samples), counts)
+        local_idx = rng.integers(0, nobj, size=sample_ids.size)
+        return sample_ids, local_idx
 
     def _join_histograms(
         self, bvals: np.ndarray, yvals: np.ndarray
-    ) -> tuple[np.ndarray, np.ndarray]:  # pragma: no cover
-        bvals_r = self.comm.reduce(bvals)
-        yvals_r = self.comm.reduce(yvals)
+    ) -> tuple[np.ndarray | None, np.ndarray | None]:  # pragma: no cover
+        # sum both histograms onto rank 0 with a single buffer reduction
+        sendbuf = np.concatenate([np.ravel(bvals), np.ravel(yvals)])
+        recvbuf = np.empty_like(sendbuf) if self.rank == 0 else None
+        self.comm.Reduce(sendbuf, recvbuf, root=0)
+        if self.rank != 0:
+            return (None, None)
+        assert recvbuf is not None
+        bvals_r = recvbuf[: bvals.size].reshape(bvals.shape)
+        yvals_r = recvbuf[bvals.size :].reshape(yvals.shape)
         return (bvals_r, yvals_r)
 
 
@@ -95,6 +95,11 @@ def naive_stack_summarizer(**kwargs) -> Any:
     """
     Summarizer which stacks individual P(z)
 
+    The bootstrap samples in ``output`` are drawn one chunk at a time, so the
+    number of objects in each sample is a sum of per-chunk Binomial draws that
+    scatters around the number of input objects, rather than being exactly
+    equal to it.  See `PZSummarizer._chunk_bootstrap_draws`.
+
     ---
 
     Summarizer for NaiveStack which returns multiple items
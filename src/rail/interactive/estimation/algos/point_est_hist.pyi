@@ -98,6 +98,11 @@ def point_est_hist_summarizer(**kwargs) -> Any:
     """
     Summarizer which simply histograms a point estimate
 
+    Each bootstrap histogram in ``output`` counts a Binomial number of draws
+    from every chunk, so its total fluctuates around the number of input
+    objects instead of matching it exactly.  See
+    `PZSummarizer._chunk_bootstrap_draws`.
+
     ---
 
     The main run method for the summarization, should be implemented
@@ -0,0 +1,178 @@
+"""Utility functions for histogramming on uniform grids, and for adding up
+bootstrap draws into per-sample histograms or stacks"""
+
+import numpy as np
+
+from rail.utils.numba_utils import HAS_NUMBA, njit, prange
+
+
+def uniform_bin_index(vals: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Find which of a set of evenly spaced bins each value falls in
+
+    This gives the same answer as binning with ``np.histogram(vals, bins=edges)``,
+    i.e., the bins are half-open except for the last one, which includes the
+    upper edge, but it computes the bin from the bin width rather than with a
+    binary search through the edges.
+
+    Parameters
+    ----------
+    vals : np.ndarray
+        The values to bin, will be flattened
+    edges : np.ndarray
+        The bin edges, which must be evenly spaced, e.g., from `np.linspace`
+
+    Returns
+    -------
+    np.ndarray
+        The index of the bin of each value, or -1 for values outside the
+        edges (or NaN)
+    """
+    vals = np.ravel(vals)
+    nbins = edges.size - 1
+    valid = (vals >= edges[0]) & (vals <= edges[-1])
+    in_range = vals[valid]
+    idx = ((in_range - edges[0]) * (nbins / (edges[-1] - edges[0]))).astype(np.intp)
+    np.clip(idx, 0, nbins - 1, out=idx)
+    # the bin width arithmetic can be off by one right next to an edge
+    idx -= in_range < edges[idx]
+    idx += (in_range >= edges[idx + 1]) & (idx < nbins - 1)
+    bin_index = np.full(vals.size, -1, dtype=np.intp)
+    bin_index[valid] = idx
+    return bin_index
+
+
+def normalize_stack(yvals: np.ndarray, zgrid: np.ndarray) -> np.ndarray:
+    """Normalize stacked p(z) in place, the same way `qp.interp` would
+
+    This lets summarizers build their output ensembles with ``norm=False`` so
+    that qp does not make another pass over the stacks.  Pass a copy if the
+    input values are still needed afterwards.
+
+    Parameters
+    ----------
+    yvals : np.ndarray
+        The stacked p(z), shape (nstack, nzbins), updated in place
+    zgrid : np.ndarray
+        The evenly spaced grid the stacks are evaluated on
+
+    Returns
+    -------
+    np.ndarray
+        The normalized stacks, stacks that sum to zero are left at zero
+    """
+    # qp integrates with the trapezoid rule, on an even grid that is
+    # dz * (sum - (y[0] + y[-1]) / 2)
+    dz = zgrid[1] - zgrid[0]
+    norms = dz * (yvals.sum(axis=1) - 0.5 * (yvals[:, 0] + yvals[:, -1]))
+    inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    yvals *= inv_norms[:, None]
+    return yvals
+
+
+# The bootstrap kernels below take the draws sorted by sample, with
+# offsets[i]:offsets[i + 1] the draws of sample i.  Each parallel iteration
+# then fills a single row of the output, so no two threads add to the same
+# element and no atomics are needed.
+
+
+@njit(parallel=True, cache=True)
+def _count_draws_kernel(
+    bin_index: np.ndarray,
+    local_idx: np.ndarray,
+    offsets: np.ndarray,
+    out: np.ndarray,
+) -> None:  # pragma: no cover
+    for i in prange(offsets.size - 1):
+        for d in range(offsets[i], offsets[i + 1]):
+            b = bin_index[local_idx[d]]
+            if b >= 0:
+                out[i, b] += 1
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _stack_draws_kernel(
+    vals: np.ndarray,
+    local_idx: np.ndarray,
+    offsets: np.ndarray,
+    out: np.ndarray,
+) -> None:  # pragma: no cover
+    ncols = vals.shape[1]
+    for i in prange(offsets.size - 1):
+        for d in range(offsets[i], offsets[i + 1]):
+            row = local_idx[d]
+            for k in range(ncols):
+                out[i, k] += vals[row, k]
+
+
+def _sample_offsets(sample_ids: np.ndarray, n_samples: int) -> np.ndarray:
+    """Where the draws of each sample start in the sorted sample_ids"""
+    return np.searchsorted(sample_ids, np.arange(n_samples + 1))
+
+
+def _sample_pair_counts(
+    sample_ids: np.ndarray, cols: np.ndarray, n_samples: int, ncols: int
+) -> np.ndarray:
+    """Count the draws of each (sample, col) pair, shape (n_samples, ncols)"""
+    return np.bincount(sample_ids * ncols + cols, minlength=n_samples * ncols).reshape(
+        n_samples, ncols
+    )
+
+
+def histogram_bootstrap_draws(
+    bin_index: np.ndarray,
+    sample_ids: np.ndarray,
+    local_idx: np.ndarray,
+    out: np.ndarray,
+) -> None:
+    """Add the bootstrap draws in a chunk to the histograms of their samples
+
+    Parameters
+    ----------
+    bin_index : np.ndarray
+        The bin of each object in the chunk, or -1 for objects to skip, e.g.,
+        from `uniform_bin_index`
+    sample_ids : np.ndarray
+        The sample each draw belongs to, sorted
+    local_idx : np.ndarray
+        The index in the chunk of each drawn object
+    out : np.ndarray
+        The histograms, shape (n_samples, nbins), updated in place
+    """
+    n_samples, nbins = out.shape
+    if HAS_NUMBA:
+        offsets = _sample_offsets(sample_ids, n_samples)
+        _count_draws_kernel(bin_index, local_idx, offsets, out)
+    else:  # pragma: no cover
+        draw_bin = bin_index[local_idx]
+        valid = draw_bin >= 0
+        out += _sample_pair_counts(sample_ids[valid], draw_bin[valid], n_samples, nbins)
+
+
+def stack_bootstrap_draws(
+    vals: np.ndarray,
+    sample_ids: np.ndarray,
+    local_idx: np.ndarray,
+    out: np.ndarray,
+) -> None:
+    """Add the rows of the bootstrap draws in a chunk to the stacks of their samples
+
+    Parameters
+    ----------
+    vals : np.ndarray
+        The values of the objects in the chunk, e.g., their p(z) on a grid,
+        shape (nobj, ncols)
+    sample_ids : np.ndarray
+        The sample each draw belongs to, sorted
+    local_idx : np.ndarray
+        The index in the chunk of each drawn object
+    out : np.ndarray
+        The stacks, shape (n_samples, ncols), updated in place
+    """
+    n_samples = out.shape[0]
+    if HAS_NUMBA:
+        offsets = _sample_offsets(sample_ids, n_samples)
+        _stack_draws_kernel(vals, local_idx, offsets, out)
+    else:  # pragma: no cover
+        # how often each object was drawn in each sample, then one matmul
+        counts = _sample_pair_counts(sample_ids, local_idx, n_samples, vals.shape[0])
+        out += counts.astype(vals.dtype) @ vals
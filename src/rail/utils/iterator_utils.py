@@ -0,0 +1,61 @@
+"""Utility functions for iterating over chunks of data"""
+
+import gc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
+
+_DONE = object()
+
+# number of chunks between full garbage collections in collect_after_chunk
+_FULL_GC_INTERVAL = 16
+
+
+def prefetch_iterator(iterable: Iterable) -> Iterator:
+    """Iterate while reading the next item in a background thread
+
+    This is meant to wrap the chunk iterators returned by
+    `RailStage.input_iterator`, so that the next chunk is read from disk
+    while the current one is being processed.  At most one item is read ahead,
+    so there are at most two chunks in memory at a time.  Any exception raised
+    by the underlying iterator is re-raised in the calling thread.
+
+    Parameters
+    ----------
+    iterable : Iterable
+        The items to iterate over
+
+    Yields
+    ------
+    Any
+        The items of ``iterable``, in order
+    """
+    iterator = iter(iterable)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(next, iterator, _DONE)
+        while True:
+            item = future.result()
+            if item is _DONE:
+                return
+            future = executor.submit(next, iterator, _DONE)
+            yield item
+
+
+def collect_after_chunk(i_chunk: int) -> int:
+    """Run the garbage collection that follows each chunk of a stage run loop
+
+    Running garbage collection manually seems to be needed to avoid memory
+    growth for some estimators, but a full sweep gets slow as the heap grows,
+    so only the youngest generation is collected after most chunks and a full
+    collection is done every ``_FULL_GC_INTERVAL`` chunks.
+
+    Parameters
+    ----------
+    i_chunk : int
+        The index of the chunk that was just processed, starting at zero
+
+    Returns
+    -------
+    int
+        The number of unreachable objects found, as from `gc.collect`
+    """
+    return gc.collect(0 if (i_chunk + 1) % _FULL_GC_INTERVAL else 2)
@@ -0,0 +1,40 @@
+"""Optional numba support
+
+numba is not a hard dependency of rail_base.  Modules that have jit-compiled
+kernels import ``njit`` and ``prange`` from here and check ``HAS_NUMBA`` to
+decide whether to call the kernel or a pure numpy fallback.  Without numba
+the decorators leave the functions as plain python.
+"""
+
+from typing import TYPE_CHECKING, Any, Callable
+
+# the decorators are re-exported for the modules with jit-compiled kernels,
+# from numba itself or from the stand-ins below
+__all__ = ["HAS_NUMBA", "njit", "prange", "vectorize"]
+
+if TYPE_CHECKING:
+    # type check against the numba signatures, the stand-ins only exist at runtime
+    from numba import njit, prange, vectorize
+
+    HAS_NUMBA: bool
+else:
+    try:
+        from numba import njit, prange, vectorize
+
+        HAS_NUMBA = True
+    except ImportError:  # pragma: no cover
+        HAS_NUMBA = False
+
+        prange = range
+
+        def njit(*args: Any, **kwargs: Any) -> Callable:
+            """Stand-in for `numba.njit` that leaves the function un-compiled"""
+            if len(args) == 1 and callable(args[0]) and not kwargs:
+                return args[0]
+
+            def decorator(func: Callable) -> Callable:
+                return func
+
+            return decorator
+
+        vectorize = njit
@@ -2,9 +2,23 @@ import os
 
 import pytest
 
+from rail.utils.numba_utils import HAS_NUMBA
 from rail.utils.path_utils import find_rail_file
 
 
+@pytest.fixture(name="use_numba", params=[True, False], ids=["numba", "numpy"])
+def use_numba(request: pytest.FixtureRequest) -> bool:
+    """Whether to run the numba kernels or the numpy fallbacks
+
+    Tests patch ``HAS_NUMBA`` in the module under test with this value.  The
+    numba case is skipped when numba is not installed, rather than running
+    the fallback twice.
+    """
+    if request.param and not HAS_NUMBA:
+        pytest.skip("numba is not installed")
+    return request.param
+
+
 @pytest.fixture(name="get_evaluation_files", scope="package")
 def get_evaluation_files(request: pytest.FixtureRequest) -> tuple[str, str]:
     possible_local_file = "./examples_data/evaluation_data/data/output_fzboost.hdf5"
@@ -5,12 +5,14 @@ from types import GeneratorType
 import numpy as np
 import pytest
 
+from rail.core.chunked_run import ChunkedRunMixin
 from rail.core.common_params import copy_param, set_param_default
 from rail.core.data import (
     DataHandle,
     DataStore,
     FitsHandle,
     Hdf5Handle,
+    ModelDict,
     ModelHandle,
     PqHandle,
     QPHandle,
@@ -267,6 +269,47 @@ def test_model_handle() -> None:
     os.remove(model_path_wrap)
 
 
+def test_model_dict_reloads_modified_file(tmp_path) -> None:
+    model_path = str(tmp_path / "model.pkl")
+    with open(model_path, "wb") as fout:
+        pickle.dump(dict(version=1), fout)
+
+    # a private cache, so the process-wide ModelHandle.model_factory is untouched
+    factory = ModelDict()
+    model1 = factory.read(model_path)
+    assert factory.read(model_path) is model1
+
+    with open(model_path, "wb") as fout:
+        pickle.dump(dict(version=2), fout)
+    mtime = os.stat(model_path).st_mtime_ns + 1_000_000_000
+    os.utime(model_path, ns=(mtime, mtime))
+
+    model2 = factory.read(model_path)
+    assert model2["version"] == 2
+    assert factory.read(model_path) is model2
+
+    # a deleted file keeps the cached model
+    os.remove(model_path)
+    assert factory.read(model_path) is model2
+
+
+def test_chunked_run_mixin() -> None:
+    class ChunkedRunner(ChunkedRunMixin):
+        rank = 0
+
+        def __init__(self) -> None:
+            self.chunks: list[tuple[int, int, bool]] = []
+
+        def _process_chunk(self, start: int, end: int, data: list, first: bool) -> None:
+            assert data == list(range(start, end))
+            self.chunks.append((start, end, first))
+
+    runner = ChunkedRunner()
+    chunks = [(i, i + 2, list(range(i, i + 2))) for i in range(0, 4, 2)]
+    runner._run_chunks(chunks, label="test")
+    assert runner.chunks == [(0, 2, True), (2, 4, False)]
+
+
 @pytest.mark.skip(reason="Changing how datastore works")
 def test_data_store() -> None:
     # DS = RailStage.data_store
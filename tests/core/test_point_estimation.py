@@ -3,6 +3,7 @@ import numpy as np
 import pytest
 import qp
 
+from rail.core.point_estimation import _row_argmax
 from rail.estimation.estimator import CatEstimator
 
 
@@ -139,3 +140,71 @@ def test_write_new_ancil_data() -> None:
 
     assert "zmode" in output_ensemble.ancil
     assert len(output_ensemble.ancil["zmode"]) == 100
+
+
+def test_mode_matches_qp() -> None:
+    """The mode from the row argmax kernel should match `qp.Ensemble.mode`"""
+    rng = np.random.default_rng(42)
+    pdf_vals = rng.normal(size=(50, 31))
+    pdf_vals[3, 7] = np.nan
+    pdf_vals[4, 0] = np.nan
+    pdf_vals[5] = 1.0
+    assert np.array_equal(_row_argmax(pdf_vals), np.argmax(pdf_vals, axis=1))
+
+    config_dict = {"zmin": 0.0, "zmax": 3.0, "nzbins": 301}
+    test_estimator = CatEstimator.make_stage(name="test", **config_dict)
+    locs = rng.uniform(0.0, 3.0, size=(100, 1))
+    scales = 0.1 + 0.2 * rng.uniform(size=(100, 1))
+    test_ensemble = qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+    grid = np.linspace(0.0, 3.0, 301)
+    expected = test_ensemble.mode(grid)
+    assert np.array_equal(
+        test_estimator._calculate_mode_point_estimate(test_ensemble), expected
+    )
+
+
+def test_mode_and_best_share_pdf_evaluation() -> None:
+    """zmode and zbest on the same grid should only evaluate the p(z) once"""
+    config_dict = {
+        "zmin": 0.0,
+        "zmax": 3.0,
+        "nzbins": 101,
+        "calculated_point_estimates": ["zmode", "zbest"],
+    }
+    test_estimator = CatEstimator.make_stage(name="test", **config_dict)
+
+    locs = np.random.default_rng(1234).uniform(0.5, 2.5, size=(10, 1))
+    scales = 0.2 * np.ones((10, 1))
+    test_ensemble = qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+    pdf_calls = []
+    pdf = test_ensemble.pdf
+
+    def counting_pdf(x: np.ndarray) -> np.ndarray:
+        pdf_calls.append(x)
+        return pdf(x)
+
+    test_ensemble.pdf = counting_pdf
+    result = test_estimator.calculate_point_estimates(test_ensemble, None)
+
+    assert len(pdf_calls) == 1
+    assert np.allclose(result.ancil["zbest"], locs.ravel(), atol=0.05)
+
+
+def test_default_grid_is_cached_per_config() -> None:
+    """The default grid is built once per zmin, zmax and nzbins configuration"""
+    config_dict = {"zmin": 0.0, "zmax": 3.0, "nzbins": 301}
+    test_estimator = CatEstimator.make_stage(name="test", **config_dict)
+
+    grid = test_estimator._default_point_estimate_grid()
+    assert np.array_equal(grid, np.linspace(0.0, 3.0, 301))
+    assert test_estimator._default_point_estimate_grid() is grid
+
+    # only the config keys invalidate the cache, not a zgrid attribute
+    test_estimator.zgrid = np.linspace(0.0, 1.0, 11)
+    assert test_estimator._default_point_estimate_grid() is grid
+
+    test_estimator.config.nzbins = 151
+    new_grid = test_estimator._default_point_estimate_grid()
+    assert new_grid is not grid
+    assert np.array_equal(new_grid, np.linspace(0.0, 3.0, 151))
+    assert test_estimator._default_point_estimate_grid() is new_grid
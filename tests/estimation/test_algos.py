@@ -38,12 +38,25 @@ def test_random_pz() -> None:
         "RandomPZ", train_algo, pz_algo, train_config_dict, estim_config_dict
     )
     assert np.isclose(results.ancil["zmode"], zb_expected).all()
+    # the deprecated name of the upper quantile is kept as an alias
+    assert np.array_equal(results.ancil["z_97p5"], results.ancil["z_q97p5"])
     try:
         os.remove("model.pkl")
     except FileNotFoundError:  # pragma: no cover
         pass
 
 
+def test_random_pz_zgrid_follows_config() -> None:
+    estimator = random_gauss.RandomGaussEstimator.make_stage(
+        name="random_zgrid", rand_zmin=0.0, rand_zmax=3.0, nzbins=301
+    )
+    estimator._initialize_run()
+    assert np.array_equal(estimator.zgrid, np.linspace(0.0, 3.0, 301))
+    estimator.config.nzbins = 151
+    estimator._initialize_run()
+    assert np.array_equal(estimator.zgrid, np.linspace(0.0, 3.0, 151))
+
+
 def test_train_pz() -> None:
     train_config_dict = dict(
         zmin=0.0,
@@ -217,6 +230,59 @@ def test_gaussian_pz() -> None:
     assert outdata.data.npdf == 10
 
 
+def test_align_chunk_size(tmp_path) -> None:
+    h5py = pytest.importorskip("h5py")
+    input_path = str(tmp_path / "chunked_input.hdf5")
+    with h5py.File(input_path, "w") as fout:
+        group = fout.create_group("photometry")
+        group.create_dataset("mag_i_lsst", data=np.ones(5000), chunks=(1000,))
+        group.create_dataset("id", data=np.arange(5000))
+
+    estimator = random_gauss.RandomGaussEstimator.make_stage(
+        name="align_chunks", hdf5_groupname="photometry", chunk_size=2500
+    )
+    estimator.set_data("input", TableHandle("input", path=input_path), do_read=False)
+    assert estimator._align_chunk_size() == 2000
+    # the config is left alone, so repeated runs align the same way
+    assert estimator.config.chunk_size == 2500
+    assert estimator._align_chunk_size() == 2000
+
+    # never read more rows than configured, even if a disk chunk does not fit
+    estimator.config.chunk_size = 500
+    assert estimator._align_chunk_size() == 500
+
+    # with more processes than chunks the size is reduced so that every
+    # process gets some rows, and then aligned with the disk chunks
+    estimator.config.chunk_size = 2500
+    estimator._size = 4
+    assert estimator._align_chunk_size() == 1000
+    assert estimator.config.chunk_size == 2500
+    for rank in range(4):
+        estimator._rank = rank
+        chunks = list(
+            estimator.input_iterator("input", chunk_size=estimator._align_chunk_size())
+        )
+        assert chunks
+        for start, end, _ in chunks:
+            assert start % 1000 == 0
+            assert end % 1000 == 0
+    assert estimator.config.chunk_size == 2500
+
+
+def test_background_chunk_write() -> None:
+    class FailingHandle:
+        def write_chunk(self, start: int, end: int) -> None:
+            raise OSError(f"cannot write {start} - {end}")
+
+    estimator = random_gauss.RandomGaussEstimator.make_stage(name="background_write")
+    estimator._write_chunk_in_background(FailingHandle(), 4, 6)
+    # errors from the background writer are raised once the writes finish
+    with pytest.raises(OSError):
+        estimator._finish_chunk_writes()
+    assert estimator._write_executor is None
+    assert estimator._pending_write is None
+
+
 def test_train_pz_with_output_mode_return():
     """Tests that output_mode = return works for estimation algorithms"""
     train_config_dict = dict(
@@ -7,6 +7,7 @@ from rail.core.data import QPHandle
 from rail.core.stage import RailStage
 from rail.estimation.algos.equal_count import EqualCountClassifier
 from rail.estimation.algos.uniform_binning import UniformBinningClassifier
+from rail.estimation.classifier import PZClassifier
 from rail.utils.path_utils import RAILDIR
 
 # DS = RailStage.data_store
@@ -56,9 +57,11 @@ def test_UniformBinningClassifier_binsize() -> None:
 
     # check length:
     assert len(out_data["class_id"]) == len(out_data["row_index"])
+    # the class ids are written in the smallest type that holds them
+    assert out_data["class_id"].dtype == np.int16
 
     # check that the assignment is as expected:
-    assert (np.in1d(np.unique(out_data["class_id"]), [1, 2, -99])).all()
+    assert (np.isin(np.unique(out_data["class_id"]), [1, 2, -99])).all()
 
     zb = input_data.data.ancil["zmode"]
     if 1 in out_data["class_id"]:
@@ -79,6 +82,38 @@ def test_UniformBinningClassifier_binsize() -> None:
     os.remove(tomo.get_output(tomo.get_aliased_tag("output"), final_name=True))
 
 
+def test_UniformBinningClassifier_chunks() -> None:
+    """The row index counts over the whole input when it is read in chunks"""
+    input_data_handle = QPHandle("input_data", path=inputdata)
+    n_obj = input_data_handle.size()
+
+    tomo = UniformBinningClassifier.make_stage(
+        name="uniform_binning_chunks",
+        point_estimate_key="zmode",
+        no_assign=-99,
+        zmin=0.0,
+        zmax=2.0,
+        n_tom_bins=2,
+        chunk_size=3,
+    )
+    assert tomo.config.chunk_size < n_obj
+    out_data = tomo.classify(input_data_handle).read(force=True)
+
+    assert np.array_equal(out_data["row_index"], np.arange(n_obj))
+    assert out_data["class_id"].dtype == np.int16
+    os.remove(tomo.get_output(tomo.get_aliased_tag("output"), final_name=True))
+
+
+def test_class_id_dtype() -> None:
+    assert PZClassifier._class_id_dtype(2, -99) == np.int16
+    assert PZClassifier._class_id_dtype(2, -(2**20)) == np.int32
+    assert PZClassifier._class_id_dtype(2**16, -1) == np.int32
+    # the index above the last edge, n_classes + 1, has to fit too
+    int16_max = np.iinfo(np.int16).max
+    assert PZClassifier._class_id_dtype(int16_max - 1, -99) == np.int16
+    assert PZClassifier._class_id_dtype(int16_max, -99) == np.int32
+
+
 def test_UniformBinningClassifier_ancil() -> None:
     # DS.clear()
     # input_data = DS.read_file("input_data", QPHandle, inputdata)
@@ -135,8 +170,10 @@ def test_EqualCountClassifier_nobj() -> None:
     output_data = tomo.classify(input_data)
     out_data = output_data.data
 
+    assert out_data["class_id"].dtype == np.int16
+
     # check that there are equal number of object in each bin modulo Ngal%Nbins
-    assert (np.in1d(np.unique(out_data["class_id"]), [1, 2, -99])).all()
+    assert (np.isin(np.unique(out_data["class_id"]), [1, 2, -99])).all()
 
     Ngal = sum(out_data["class_id"] != -99)
     exp_Ngal_perbin = int(Ngal / 2)
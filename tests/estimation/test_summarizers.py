@@ -1,6 +1,8 @@
 import os
 from typing import Any
 
+import numpy as np
+import pytest
 import qp
 
 from rail.core.data import QPHandle, TableHandle
@@ -87,6 +89,13 @@ def test_naive_stack() -> None:
     )
 
 
+def test_naive_stack_single_object_chunk() -> None:
+    """Run the Naive stack with chunks that leave a single object in the last one"""
+    summary_config_dict = dict(chunk_size=3)
+    summarizer_class = naive_stack.NaiveStackSummarizer
+    _ = one_algo("NaiveStackSingle", summarizer_class, summary_config_dict)
+
+
 def test_point_estimate_hist() -> None:
     """Basic end to end test for the point estimate histogram informer to estimator
     stages
@@ -139,3 +148,78 @@ def test_point_estimate_hist_masked() -> None:
     summarizer_class = point_est_hist.PointEstHistMaskedSummarizer
     _ = one_mask_algo("PointEstimateHist", summarizer_class, summary_config_dict)
     _ = one_algo("PointEstimateHist", summarizer_class, summary_config_dict)
+
+
+def test_chunk_bootstrap_draws() -> None:
+    """Check that the per-chunk bootstrap draws are reproducible and in range"""
+    summarizer = naive_stack.NaiveStackSummarizer.make_stage(
+        name="bootstrap_draws", n_samples=50
+    )
+    summarizer._input_length = 1000
+    sample_ids, local_idx = summarizer._chunk_bootstrap_draws(200, 300)
+    assert np.all(np.diff(sample_ids) >= 0)
+    assert sample_ids.max() < 50
+    assert local_idx.min() >= 0 and local_idx.max() < 100
+    # on average a tenth of each sample lands in this chunk
+    assert 0.08 < sample_ids.size / (50 * 1000) < 0.12
+    again = summarizer._chunk_bootstrap_draws(200, 300)
+    assert np.array_equal(again[0], sample_ids)
+    assert np.array_equal(again[1], local_idx)
+
+
+@pytest.mark.parametrize("nzbins", [301, 151])
+def test_var_inference_numba(monkeypatch: pytest.MonkeyPatch, nzbins: int) -> None:
+    """Check the variational inference kernel against the numpy iterations,
+    both on the grid the input p(z) are tabulated on and on a different one
+    """
+    input_data = qp.read(testdata)
+    summarizer = var_inf.VarInfStackSummarizer.make_stage(name="var_inf_numba")
+    summarizer.zgrid = np.linspace(0.0, 3.0, nzbins)
+    alpha_trace = summarizer._process_chunk(0, input_data.npdf, input_data, True)
+    monkeypatch.setattr(var_inf, "HAS_NUMBA", False)
+    expected = summarizer._process_chunk(0, input_data.npdf, input_data, True)
+    assert np.allclose(alpha_trace, expected, rtol=1e-5)
+
+
+def test_var_inference_tol(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A tol of 0 runs all n_iter iterations, the default tol stops early"""
+    input_data = qp.read(testdata)
+    n_calls = [0]
+
+    def counted(func: Any) -> Any:
+        def wrapper(*args: Any) -> np.ndarray:
+            n_calls[0] += 1
+            return func(*args)
+
+        return wrapper
+
+    for name in ["_responsibility_sums", "_responsibility_sums_numpy"]:
+        monkeypatch.setattr(var_inf, name, counted(getattr(var_inf, name)))
+
+    summarizer = var_inf.VarInfStackSummarizer.make_stage(
+        name="var_inf_tol", n_iter=20, tol=0.0
+    )
+    summarizer.zgrid = np.linspace(0.0, 3.0, 301)
+    exact = summarizer._process_chunk(0, input_data.npdf, input_data, True)
+    assert n_calls[0] == 20
+
+    n_calls[0] = 0
+    summarizer = var_inf.VarInfStackSummarizer.make_stage(
+        name="var_inf_tol_default", n_iter=20
+    )
+    summarizer.zgrid = np.linspace(0.0, 3.0, 301)
+    early = summarizer._process_chunk(0, input_data.npdf, input_data, True)
+    assert 0 < n_calls[0] < 20
+    assert np.allclose(early, exact, rtol=1e-3)
+
+
+def test_var_inference_responsibility_sums() -> None:
+    """Check the blocked responsibility sums against a direct computation"""
+    rng = np.random.default_rng(9)
+    # more galaxies than fit in one block
+    log_pdf_vals = np.log(rng.random((2500, 31)) + var_inf.TEENY).astype(np.float32)
+    dig = rng.normal(size=31)
+    matrix_grid = np.exp(dig + log_pdf_vals.astype(np.float64))
+    expected = (matrix_grid / matrix_grid.sum(axis=1, keepdims=True)).sum(axis=0)
+    for func in [var_inf._responsibility_sums, var_inf._responsibility_sums_numpy]:
+        assert np.allclose(func(log_pdf_vals, dig), expected, rtol=1e-5)
@@ -1,9 +1,12 @@
 import os
 
+import numpy as np
+import pytest
 import qp
 
 from rail.core.data import TableHandle
 from rail.core.stage import RailStage
+from rail.estimation.algos import true_nz as true_nz_module
 from rail.estimation.algos.true_nz import TrueNZHistogrammer
 
 # DS = RailStage.data_store
@@ -52,3 +55,22 @@ def test_true_nz() -> None:
         os.remove(
             nz_hist.get_output(nz_hist.get_aliased_tag("true_NZ"), final_name=True)
         )
+
+
+def test_true_nz_histogram_chunk(
+    monkeypatch: pytest.MonkeyPatch, use_numba: bool
+) -> None:
+    """Check the chunk histogram against np.histogram"""
+    monkeypatch.setattr(true_nz_module, "HAS_NUMBA", use_numba)
+    edges = np.linspace(0.0, 3.0, 302)
+    rng = np.random.default_rng(7)
+    # include values right on the edges, out of range and not finite, in a
+    # non-native byte order like data read from file
+    zb = np.concatenate([rng.uniform(-0.5, 3.5, 200000), edges, [np.nan, np.inf]])
+    zb = zb.astype(">f8")
+    mask = rng.random(zb.size) < 0.5
+
+    expected = np.histogram(zb, bins=edges)[0]
+    assert np.array_equal(true_nz_module._histogram_chunk(zb, None, edges), expected)
+    expected = np.histogram(zb[mask], bins=edges)[0]
+    assert np.array_equal(true_nz_module._histogram_chunk(zb, mask, edges), expected)
@@ -3,11 +3,21 @@ from types import GeneratorType
 import numpy as np
 
 import pytest
+import qp
 
 from rail.core.data import Hdf5Handle, ModelHandle, TableHandle
 from rail.core.stage import RailStage
 from rail.core.common_params import SHARED_PARAMS
 from rail.tools.table_tools import ColumnMapper, RowSelector, TableConverter
+from rail.utils import histogram_utils
+from rail.utils.histogram_utils import (
+    histogram_bootstrap_draws,
+    normalize_stack,
+    stack_bootstrap_draws,
+    uniform_bin_index,
+)
+from rail.utils import iterator_utils
+from rail.utils.iterator_utils import collect_after_chunk, prefetch_iterator
 from rail.utils.path_utils import RAILDIR, find_rail_file
 from rail.utils.catalog_utils_old import CatalogConfigBase
 from rail.utils import catalog_utils
@@ -22,6 +32,100 @@ def test_find_rail_file() -> None:
         _not_a_file = find_rail_file("not_a_file")
 
 
+def test_uniform_bin_index() -> None:
+    edges = np.linspace(0.0, 3.0, 302)
+    rng = np.random.default_rng(42)
+    vals = np.concatenate(
+        [rng.uniform(-0.5, 3.5, 1000), edges, np.nextafter(edges, -1), [np.nan]]
+    )
+    bin_index = uniform_bin_index(vals, edges)
+    expected = np.searchsorted(edges, vals, side="right") - 1
+    expected[vals == edges[-1]] = edges.size - 2
+    expected[(expected < 0) | (expected >= edges.size - 1) | np.isnan(vals)] = -1
+    assert np.array_equal(bin_index, expected)
+    assert np.array_equal(
+        np.bincount(bin_index[bin_index >= 0], minlength=edges.size - 1),
+        np.histogram(vals[np.isfinite(vals)], bins=edges)[0],
+    )
+
+
+def test_normalize_stack() -> None:
+    """Check the stack normalization against the one qp does"""
+    zgrid = np.linspace(0.0, 3.0, 31)
+    yvals = np.random.default_rng(3).random((4, 31)) * 50.0
+    yvals[1] = 0.0
+    expected = qp.Ensemble(qp.interp, data=dict(xvals=zgrid, yvals=yvals[[0, 2, 3]]))
+    normed = normalize_stack(yvals.copy(), zgrid)
+    assert np.allclose(normed[[0, 2, 3]], expected.objdata["yvals"])
+    assert np.all(normed[1] == 0.0)
+
+
+def test_stack_bootstrap_draws(
+    monkeypatch: pytest.MonkeyPatch, use_numba: bool
+) -> None:
+    """Check the bootstrap stacking against a simple per-sample loop"""
+    monkeypatch.setattr(histogram_utils, "HAS_NUMBA", use_numba)
+    rng = np.random.default_rng(12)
+    sample_ids = np.sort(rng.integers(0, 7, size=60))
+    local_idx = rng.integers(0, 20, size=60)
+    pdf_vals = rng.random((20, 11))
+
+    expected = np.zeros((7, 11))
+    for i in range(7):
+        expected[i] = pdf_vals[local_idx[sample_ids == i]].sum(axis=0)
+
+    bvals = np.zeros((7, 11))
+    stack_bootstrap_draws(pdf_vals, sample_ids, local_idx, bvals)
+    assert np.allclose(bvals, expected)
+
+
+def test_histogram_bootstrap_draws(
+    monkeypatch: pytest.MonkeyPatch, use_numba: bool
+) -> None:
+    """Check the bootstrap histograms against a simple per-sample loop"""
+    monkeypatch.setattr(histogram_utils, "HAS_NUMBA", use_numba)
+    rng = np.random.default_rng(5)
+    sample_ids = np.sort(rng.integers(0, 7, size=80))
+    local_idx = rng.integers(0, 20, size=80)
+    gal_bin = rng.integers(-1, 9, size=20)
+
+    expected = np.zeros((7, 9))
+    for i in range(7):
+        bins = gal_bin[local_idx[sample_ids == i]]
+        expected[i] = np.bincount(bins[bins >= 0], minlength=9)
+
+    hist_vals = np.zeros((7, 9), dtype=np.int64)
+    histogram_bootstrap_draws(gal_bin, sample_ids, local_idx, hist_vals)
+    assert np.array_equal(hist_vals, expected)
+
+
+def test_prefetch_iterator() -> None:
+    assert list(prefetch_iterator(range(5))) == list(range(5))
+    assert not list(prefetch_iterator([]))
+
+    def failing():
+        yield 1
+        raise ValueError("bad chunk")
+
+    prefetched = prefetch_iterator(failing())
+    assert next(prefetched) == 1
+    with pytest.raises(ValueError):
+        next(prefetched)
+
+
+def test_collect_after_chunk(monkeypatch: pytest.MonkeyPatch) -> None:
+    generations: list[int] = []
+    monkeypatch.setattr(iterator_utils.gc, "collect", generations.append)
+    for i_chunk in range(2 * iterator_utils._FULL_GC_INTERVAL):
+        collect_after_chunk(i_chunk)
+    interval = iterator_utils._FULL_GC_INTERVAL
+    assert [i for i, gen in enumerate(generations) if gen == 2] == [
+        interval - 1,
+        2 * interval - 1,
+    ]
+    assert all(gen == 0 for i, gen in enumerate(generations) if (i + 1) % interval)
+
+
 def test_util_stages() -> None:
     # DS = RailStage.data_store
     # DS.clear()